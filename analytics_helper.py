@@ -1,193 +1,891 @@
 import os
+import asyncio
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date, datetime, timedelta
+from google.analytics.data_v1beta import BetaAnalyticsDataClient, BetaAnalyticsDataAsyncClient
+from google.api_core import exceptions as api_exceptions
 from google.analytics.data_v1beta.types import (
     RunReportRequest,
+    BatchRunReportsRequest,
+    RunRealtimeReportRequest,
+    MinuteRange,
     DateRange,
     Dimension,
     Metric,
     FilterExpression,
     Filter,
-    FilterExpressionList
+    FilterExpressionList,
+    OrderBy,
+    MetricType
 )
 import json
 import time
-import pickle
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
 import hashlib
+import threading
+from collections import OrderedDict
+from cache_store import CacheStore
+from export_writer import ExportWriter
+from ga4_replay import client_from_env, AsyncClientAdapter
 
-# Set credentials
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "animated-moon-487420-h4-435de0712ac6.json"
+# Set credentials (an existing GOOGLE_APPLICATION_CREDENTIALS wins; stand-in clients need none)
+os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", "animated-moon-487420-h4-435de0712ac6.json")
 PROPERTY_ID = "524822431"
+BATCH_REPORTS_MAX = 5  # GA4 batchRunReports limit per call
+DATE_RANGES_MAX = 4  # GA4 runReport limit of date ranges per request
+PAGE_SIZE_MAX = 250000  # GA4 runReport max rows per request
+PAGE_WORKERS = 4  # parallel page requests per report
+
+# Cache freshness: closed periods never expire, recent days are re-checked for late GA4 data
+TODAY_TTL = 15 * 60  # results that include today
+RECENT_DAYS = 3  # GA4 may still revise the last ~3 days
+RECENT_TTL = 6 * 60 * 60
+MEMORY_CACHE_MAX_BYTES = 256 * 1024 ** 2  # in-process cache tier
+
+# Live feed: the Realtime API covers the last 30 minutes of a standard property
+REALTIME_MINUTES = 30
+LIVE_METRICS = ["activeUsers", "sessions", "screenPageViews", "eventCount"]  # same columns as get_minutely_traffic
+REALTIME_METRICS = ["activeUsers", "screenPageViews", "eventCount"]  # realtime has no sessions metric
+
+# Quota pacing and retries (GA4 standard property: 40k tokens/hour, 200k tokens/day)
+TOKENS_PER_HOUR = 40000
+PACE_BELOW = 0.5  # start spacing requests once less than half the hourly tokens are left
+PACE_MAX = 60.0  # longest gap between two requests, in seconds
+API_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 64.0
+RETRYABLE_ERRORS = (
+    api_exceptions.ResourceExhausted,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+)
+
+# Per-page detail breakdowns (same queries as get_page_totals/daily/sources/countries/cities);
+# only the metrics the detail page draws are requested
+PAGE_BREAKDOWNS = {
+    "totals": {"dimensions": [], "metrics": ["screenPageViews", "activeUsers", "sessions"]},
+    "daily": {"dimensions": ["date"], "metrics": ["activeUsers", "sessions", "screenPageViews", "eventCount"]},
+    "sources": {"dimensions": ["sessionDefaultChannelGroup"], "metrics": ["screenPageViews"]},
+    "countries": {"dimensions": ["country"], "metrics": ["screenPageViews"]},
+    "cities": {"dimensions": ["city", "country"], "metrics": ["screenPageViews"]},
+}
+
+# Time series granularities, finest first: the GA4 time dimension, how its values
+# parse and the chart bucket its rows are summed into (see time_grain)
+TIME_GRAINS = [
+    {"dimension": "dateHourMinute", "format": "%Y%m%d%H%M", "bucket": "10min"},
+    {"dimension": "dateHour", "format": "%Y%m%d%H", "bucket": "60min"},
+    {"dimension": "date", "format": "%Y%m%d", "bucket": "1D"},
+]
+CHART_POINTS = 1000  # most buckets a time series chart should draw
+# String dimensions with few distinct values per many rows; kept as pandas
+# categoricals (Arrow dictionary arrays in the cache) instead of object columns
+CATEGORICAL_DIMENSIONS = {"pagePath", "pageTitle", "city", "country", "sessionDefaultChannelGroup", "eventName",
+                          "fileName", "linkUrl"}
+
+def encode_dimensions(df):
+    """Turn the CATEGORICAL_DIMENSIONS columns of df into categoricals (in place); returns df."""
+    for column in CATEGORICAL_DIMENSIONS.intersection(df.columns):
+        if not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    return df
+
+
+def resolve_date(value, today=None):
+    """Resolve a GA4 date string ("today", "yesterday", "NdaysAgo" or YYYY-MM-DD) to a date."""
+    today = today or date.today()
+    if value == "today":
+        return today
+    if value == "yesterday":
+        return today - timedelta(days=1)
+    if value.endswith("daysAgo"):
+        return today - timedelta(days=int(value[:-len("daysAgo")]))
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+class QuotaLimiter:
+    """Paces GA4 requests by the property quota reported in responses.
+
+    Requests go out back to back while plenty of hourly tokens are left;
+    below PACE_BELOW of the hourly budget they are spread so the remaining
+    tokens last the rest of the hour. Shared by all threads of a helper.
+    """
+
+    def __init__(self, tokens_per_hour=TOKENS_PER_HOUR):
+        self.tokens_per_hour = tokens_per_hour
+        self.remaining = None
+        self.avg_cost = 10.0  # tokens per request, smoothed
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, quota):
+        """Record the PropertyQuota of a response (ignored if the response carries none)."""
+        hour = quota.tokens_per_hour if quota is not None else None
+        if hour is None or not (hour.remaining or hour.consumed):
+            return
+        with self._lock:
+            self.remaining = hour.remaining
+            if hour.consumed:
+                self.avg_cost = 0.8 * self.avg_cost + 0.2 * hour.consumed
+
+    def interval(self):
+        """Seconds to leave between two requests at the current quota level."""
+        if self.remaining is None or self.remaining >= self.tokens_per_hour * PACE_BELOW:
+            return 0.0
+        if self.remaining <= self.avg_cost:
+            return PACE_MAX
+        return min(PACE_MAX, 3600 * self.avg_cost / self.remaining)
+
+    def reserve(self):
+        """Claim the next request slot; returns how long to wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at)
+            self._next_at = start + self.interval()
+            return start - now
+
+    def backoff(self, attempt):
+        """Exponential backoff with jitter for the given retry attempt (0-based)."""
+        cap = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+        return cap / 2 + random.uniform(0, cap / 2)
+
+
+class PrefixTrie:
+    """Character trie of path prefixes; matches() gives every group whose prefix a path begins with."""
+
+    def __init__(self, groups):
+        self.root = {}
+        for group in groups:
+            node = self.root
+            for ch in group["prefix"]:
+                node = node.setdefault(ch, {})
+            node.setdefault(None, []).append(group["name"])
+
+    def matches(self, path):
+        """Group names whose prefix the path begins with (GA4 BEGINS_WITH semantics), shortest first."""
+        names, node = [], self.root
+        for ch in path:
+            node = node.get(ch)
+            if node is None:
+                break
+            names.extend(node.get(None, ()))
+        return names
+
+    def classify(self, df, column="pagePath"):
+        """df with a `group` column, one row per (row, matching group); rows matching no group are dropped."""
+        values = df[column].astype("category")
+        # Match each distinct path once and spread the result over the rows by category code
+        lookup = np.empty(len(values.cat.categories), dtype=object)
+        lookup[:] = [self.matches(path) for path in values.cat.categories]
+        df = df.assign(group=lookup[values.cat.codes.to_numpy()]).explode("group")
+        return df[df["group"].notna()]
+
+
+def _observe_quota(limiter, response):
+    """Feed the property quota of a report (or of every report in a batch) to the limiter."""
+    for report in getattr(response, "reports", None) or [response]:
+        limiter.observe(getattr(report, "property_quota", None))
+
 
 class AnalyticsHelper:
-    def __init__(self):
-        self.client = BetaAnalyticsDataClient()
-        self.property = f"properties/{PROPERTY_ID}"
-        self.cache_dir = "data_cache"
+    def __init__(self, client=None, prop=None):
+        # client: any object with the BetaAnalyticsDataClient report methods (see ga4_replay.py);
+        # by default GA4_CLIENT picks a stand-in, otherwise the live client is used.
+        # The client only carries credentials, so several helpers (properties) can share one.
+        # prop: {"name", "property_id", "tokens_per_hour"} of another GA4 property (see
+        # build_properties.py); a named property gets its own cache and export folders
+        prop = prop or {}
+        self.client = client if client is not None else self._create_client()
+        self.property = f"properties/{prop.get('property_id', PROPERTY_ID)}"
+        # Stand-in clients get their own cache so their data never mixes with live results
+        namespace = getattr(self.client, "cache_namespace", None)
+        self.cache_dir = os.path.join("data_cache", namespace) if namespace else "data_cache"
         self.data_export_dir = "exported_data"
+        if prop.get("name"):
+            self.cache_dir = os.path.join(self.cache_dir, prop["name"])
+            self.data_export_dir = os.path.join(self.data_export_dir, prop["name"])
+        self._collecting = None
+        self.page_size = PAGE_SIZE_MAX
+        # Quota is per property, so each helper paces itself
+        self.limiter = QuotaLimiter(prop.get("tokens_per_hour", TOKENS_PER_HOUR))
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
-        if not os.path.exists(self.data_export_dir):
-            os.makedirs(self.data_export_dir)
+        self.cache = CacheStore(self.cache_dir)
+        # In-process LRU tier in front of the disk cache: key -> (df, expires_at, bytes)
+        self.memory_max_bytes = MEMORY_CACHE_MAX_BYTES
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._memory_lock = threading.Lock()
+        self.cache_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        # Single flight: cache key -> Future of the fetch currently running for it
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # Live feed of today's minutes (see get_live_minutely)
+        self._live = None
+        os.makedirs(self.data_export_dir, exist_ok=True)
+        # Background writer behind save_data, created on first use; excel=True also writes .xlsx
+        self.export_excel = False
+        self._exports = None
+
+    def _create_client(self):
+        return client_from_env() or BetaAnalyticsDataClient()
+
+    def _resolved_range(self, date_range):
+        """Calendar dates (YYYY-MM-DD) of a DateRange, so "today"/"30daysAgo" keys change with the day.
+
+        For a list of ranges this is the span from the earliest start to the latest end.
+        """
+        if isinstance(date_range, (list, tuple)):
+            spans = [self._resolved_range(r) for r in date_range]
+            return [min(s[0] for s in spans), max(s[1] for s in spans)]
+        dates = []
+        for value in (date_range.start_date, date_range.end_date):
+            try:
+                dates.append(resolve_date(value).isoformat())
+            except ValueError:
+                dates.append(value)
+        return dates
 
-    def _get_cache_key(self, dimensions, metrics, date_range, dimension_filter, limit):
+    def _get_cache_key(self, dimensions, metrics, date_range, dimension_filter, limit, order_bys=None):
         """Generate a unique key for the request."""
         filter_str = str(dimension_filter) if dimension_filter else "None"
-        key_str = f"{sorted(dimensions)}_{sorted(metrics)}_{date_range.start_date}_{date_range.end_date}_{filter_str}_{limit}"
+        if isinstance(date_range, (list, tuple)):
+            start = "|".join(f"{r.name}:{'_'.join(self._resolved_range(r))}" for r in date_range)
+            end = "multi"
+        else:
+            start, end = self._resolved_range(date_range)
+        key_str = f"{sorted(dimensions)}_{sorted(metrics)}_{start}_{end}_{filter_str}_{limit}"
+        if order_bys:
+            key_str += f"_{[str(o) for o in order_bys]}"
         return hashlib.md5(key_str.encode('utf-8')).hexdigest()
 
+    def _cache_ttl(self, date_range):
+        """Freshness policy for a result: seconds until it goes stale, or None if it never does."""
+        if isinstance(date_range, (list, tuple)):
+            ttls = [self._cache_ttl(r) for r in date_range]
+            return None if all(t is None for t in ttls) else min(t for t in ttls if t is not None)
+        try:
+            end = resolve_date(date_range.end_date)
+        except ValueError:
+            return TODAY_TTL
+        today = date.today()
+        if end >= today:
+            return TODAY_TTL
+        if end > today - timedelta(days=RECENT_DAYS):
+            return RECENT_TTL
+        return None  # closed period, GA4 no longer revises it
+
+    def _remember(self, key, df, expires_at):
+        """Put a frame in the in-memory LRU tier, evicting the oldest ones beyond memory_max_bytes."""
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.memory_max_bytes:
+            return
+        with self._memory_lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key)[2]
+            self._memory[key] = (df, expires_at, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_max_bytes:
+                _, (_, _, old_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= old_size
+
+    def _is_cached(self, key):
+        """Whether a fresh result exists in memory or on disk, without loading it."""
+        with self._memory_lock:
+            entry = self._memory.get(key)
+        if entry is not None and (entry[1] is None or time.time() < entry[1]):
+            return True
+        return self.cache.contains(key)
+
     def _load_from_cache(self, key):
-        """Load dataframe from cache if exists."""
-        path = os.path.join(self.cache_dir, key + ".pkl")
-        if os.path.exists(path):
-            try:
-                with open(path, "rb") as f:
-                    return pickle.load(f)
-            except Exception as e:
-                print(f"Warning: Failed to load cache {path}: {e}")
-        return None
+        """Load dataframe from cache if it exists and has not expired.
 
-    def _save_to_cache(self, key, df):
-        """Save dataframe to cache."""
-        path = os.path.join(self.cache_dir, key + ".pkl")
-        try:
-            with open(path, "wb") as f:
-                pickle.dump(df, f)
-        except Exception as e:
-            print(f"Warning: Failed to save cache {path}: {e}")
+        The memory tier is checked first; frames are handed out as shallow
+        copies so callers can add or replace columns without touching the
+        shared cached frame.
+        """
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] is None or time.time() < entry[1]:
+                    self._memory.move_to_end(key)
+                    self.cache_stats["memory_hits"] += 1
+                    return entry[0].copy(deep=False)
+                self._memory_bytes -= self._memory.pop(key)[2]
+
+        entry = self.cache.get_entry(key)
+        if entry is None:
+            self.cache_stats["misses"] += 1
+            return None
+        self.cache_stats["disk_hits"] += 1
+        df, expires_at = entry
+        self._remember(key, df, expires_at)
+        return df.copy(deep=False)
+
+    def _save_to_cache(self, key, df, spec):
+        """Save a run_report spec's dataframe to cache with the expiry its date range calls for."""
+        date_range = spec["date_range"]
+        start, end = self._resolved_range(date_range)
+        ttl = self._cache_ttl(date_range)
+        spec_str = json.dumps({
+            "dimensions": list(spec["dimensions"]),
+            "metrics": list(spec["metrics"]),
+            "dimension_filter": str(spec.get("dimension_filter")) if spec.get("dimension_filter") else None,
+            "limit": spec.get("limit"),
+            "order_bys": [str(o) for o in spec.get("order_bys") or []] or None,
+        }, ensure_ascii=False)
+        expires_at = None if ttl is None else time.time() + ttl
+        self.cache.put(key, df, spec_str, start, end, expires_at)
+        self._remember(key, df, expires_at)
+
+    def cache_summary(self):
+        """One-line hit/miss report for the memory and disk cache tiers."""
+        st = self.cache_stats
+        return (f"bellek {st['memory_hits']} isabet, disk {st['disk_hits']} isabet, {st['misses']} ıska "
+                f"({len(self._memory)} çerçeve, {self._memory_bytes / 1024 ** 2:.1f} MB bellekte)")
 
     def clear_cache(self):
         """Clear all cached data to force fresh API calls."""
-        import glob
-        for f in glob.glob(os.path.join(self.cache_dir, "*.pkl")):
-            os.remove(f)
+        with self._memory_lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        self.cache.clear()
         print("  [CACHE] Tüm önbellek temizlendi")
 
-    def save_data(self, df, name):
-        """Save dataframe to both Excel and Parquet in exported_data/."""
+    @property
+    def exports(self):
+        if self._exports is None:
+            self._exports = ExportWriter(self.data_export_dir, excel=self.export_excel)
+        return self._exports
+
+    def save_data(self, df, report, start_date="2020-01-01", end_date="today", page=None):
+        """Queue a dataframe for the exported_data/warehouse/ dataset as report over a GA4 date range.
+
+        Day-level frames replace their day partitions; other frames are stored
+        per period under page, the dashboard page they belong to, which also
+        names the .xlsx copy when export_excel is set (see warehouse.py).
+        Writes happen on a background thread and skip unchanged frames (see
+        export_writer.py); flush_exports() waits for them.
+        """
         try:
-            xlsx_path = os.path.join(self.data_export_dir, f"{name}.xlsx")
-            parquet_path = os.path.join(self.data_export_dir, f"{name}.parquet")
-            df.to_excel(xlsx_path, index=False)
-            df.to_parquet(parquet_path, index=False)
-            print(f"  [SAVED] {name} -> {len(df)} rows")
+            self.exports.submit(df, report, resolve_date(start_date).isoformat(),
+                                resolve_date(end_date).isoformat(), page)
         except Exception as e:
-            print(f"  [ERROR saving {name}]: {e}")
+            print(f"  [ERROR saving {report}]: {e}")
 
-    def run_report(self, dimensions, metrics, date_range, dimension_filter=None, limit=100000):
-        """Generic wrapper for GA4 run_report with Auto-Pagination."""
-        cache_key = self._get_cache_key(dimensions, metrics, date_range, dimension_filter, limit)
-        cached_df = self._load_from_cache(cache_key)
+    def flush_exports(self):
+        """Wait for queued save_data writes; returns a summary line."""
+        if self._exports is None:
+            return "dışa aktarım yok"
+        self._exports.flush()
+        return self._exports.summary()
+
+    def _build_request(self, dimensions, metrics, date_range, dimension_filter=None, limit=10000, offset=0,
+                       order_bys=None):
+        """Build a single RunReportRequest page."""
+        return RunReportRequest(
+            property=self.property,
+            dimensions=[Dimension(name=d) for d in dimensions],
+            metrics=[Metric(name=m) for m in metrics],
+            date_ranges=list(date_range) if isinstance(date_range, (list, tuple)) else [date_range],
+            dimension_filter=dimension_filter,
+            order_bys=order_bys,
+            limit=limit,
+            offset=offset,
+            keep_empty_rows=True,
+            return_property_quota=True
+        )
+
+    def _metric_dtype(self, response, index):
+        """numpy dtype for a metric column, from the response's metric header type."""
+        if index < len(response.metric_headers):
+            metric_type = response.metric_headers[index].type_
+            if metric_type == MetricType.TYPE_INTEGER:
+                return np.int64
+            if metric_type != MetricType.METRIC_TYPE_UNSPECIFIED:
+                return np.float64  # float, currency, durations and distances
+        return None
+
+    def _decode_columns(self, response, dimensions, metrics):
+        """Decode a response page into typed column arrays, one column at a time.
+
+        Rows are read from the underlying protobuf message, which is much
+        cheaper than going through the proto-plus wrappers per value.
+        """
+        rows = type(response).pb(response).rows
+        columns = {}
+        for i, d in enumerate(dimensions):
+            columns[d] = [row.dimension_values[i].value for row in rows]
+        for i, m in enumerate(metrics):
+            values = [row.metric_values[i].value for row in rows]
+            dtype = self._metric_dtype(response, i)
+            try:
+                columns[m] = np.array(values, dtype=dtype) if dtype else pd.to_numeric(values)
+            except ValueError:
+                columns[m] = pd.to_numeric(values, errors="coerce")
+        return columns
+
+    def _page_limit(self, limit):
+        """Rows to ask for per page: a limit below one page is sent as is (the top-N lands server-side)."""
+        return min(limit, self.page_size) if limit else self.page_size
+
+    def _remaining_offsets(self, row_count, limit):
+        """Offsets of the pages still needed after the first one, given the reported row_count."""
+        total = min(row_count, limit) if limit else row_count
+        return list(range(self.page_size, total, self.page_size))
+
+    def _metric_order(self, metric, desc=True):
+        """OrderBy on a metric, for top-N queries."""
+        return [OrderBy(metric=OrderBy.MetricOrderBy(metric_name=metric), desc=desc)]
+
+    def _call_api(self, call, request):
+        """Send one request at the pace the quota allows, retrying quota and availability errors."""
+        for attempt in range(API_RETRIES + 1):
+            time.sleep(self.limiter.reserve())
+            try:
+                response = call(request)
+            except RETRYABLE_ERRORS as e:
+                if attempt == API_RETRIES:
+                    raise
+                wait = self.limiter.backoff(attempt)
+                print(f"  [RETRY] {type(e).__name__}, {wait:.1f}s sonra tekrar ({attempt + 1}/{API_RETRIES})")
+                time.sleep(wait)
+            else:
+                _observe_quota(self.limiter, response)
+                return response
+
+    def _run_page(self, dimensions, metrics, date_range, dimension_filter, offset, limit=None, order_bys=None):
+        """Fetch one page; returns None on API error."""
+        request = self._build_request(dimensions, metrics, date_range, dimension_filter, self._page_limit(limit),
+                                      offset, order_bys)
+        try:
+            return self._call_api(self.client.run_report, request)
+        except Exception as e:
+            print(f"API Error in run_report (Offset {offset}): {e}")
+            return None
+
+    def _to_frame(self, pages, dimensions, metrics, limit, paged):
+        """Build one DataFrame from fetched pages in offset order; None if any page failed."""
+        if any(response is None for response in pages):
+            return None
+        decoded = []
+        for response in pages:
+            if response.rows:
+                decoded.append(self._decode_columns(response, dimensions, metrics))
+        if not decoded:
+            # Columns tell a report with no rows apart from a failed one (a bare empty frame)
+            return pd.DataFrame(columns=list(dimensions) + list(metrics))
+        columns = {}
+        for name in list(dimensions) + list(metrics):
+            parts = [page[name] for page in decoded]
+            if name in dimensions:
+                columns[name] = [v for part in parts for v in part] if len(parts) > 1 else parts[0]
+                if name in CATEGORICAL_DIMENSIONS:
+                    columns[name] = pd.Categorical(columns[name])
+            else:
+                columns[name] = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        df = pd.DataFrame(columns)
+        if paged and limit and len(df) > limit:
+            df = df.iloc[:limit]
+        return df
+
+    def _fetch_pages(self, dimensions, metrics, date_range, dimension_filter=None, limit=100000, response=None,
+                     order_bys=None):
+        """Fetch a report; `response` is an already fetched first page (offset 0).
+
+        The first page reports row_count, so every remaining offset is known
+        up front and those pages are requested in parallel.
+        Returns None if any page failed, so incomplete results are never cached.
+        """
+        if response is None:
+            response = self._run_page(dimensions, metrics, date_range, dimension_filter, 0, limit, order_bys)
+            if response is None:
+                return None
+
+        offsets = self._remaining_offsets(response.row_count, limit)
+        pages = [response]
+        if offsets:
+            with ThreadPoolExecutor(max_workers=min(PAGE_WORKERS, len(offsets))) as pool:
+                pages += pool.map(lambda off: self._run_page(dimensions, metrics, date_range, dimension_filter, off,
+                                                             limit, order_bys), offsets)
+        return self._to_frame(pages, dimensions, metrics, limit, bool(offsets))
+
+    def run_report(self, dimensions, metrics, date_range, dimension_filter=None, limit=100000, cache=True,
+                   order_bys=None):
+        """Generic wrapper for GA4 run_report with Auto-Pagination (cache=False bypasses the cache).
+
+        order_bys (GA4 OrderBy list) makes a limit a server-side top-N. date_range
+        may be a list of up to four DateRanges; the result then has a dateRange
+        column (see split_date_ranges).
+        """
+        dimensions = self._with_range_dimension(dimensions, date_range)
+        cache_key = self._get_cache_key(dimensions, metrics, date_range, dimension_filter, limit, order_bys)
+        spec = dict(dimensions=dimensions, metrics=metrics, date_range=date_range,
+                    dimension_filter=dimension_filter, limit=limit)
+        if order_bys:
+            spec["order_bys"] = order_bys
+        if self._collecting is not None:
+            # Collect mode (see prefetch): record the query instead of running it
+            if not self._is_cached(cache_key):
+                self._collecting.append(spec)
+            return pd.DataFrame()
+
+        cached_df = self._load_from_cache(cache_key) if cache else None
         if cached_df is not None:
             return cached_df
 
-        all_data = []
-        offset = 0
-        batch_size = 10000  # GA4 max limit per request
+        def fetch():
+            # Another caller may have filled the cache while this one waited
+            if cache and self._is_cached(cache_key):
+                cached_df = self._load_from_cache(cache_key)
+                if cached_df is not None:
+                    return cached_df
+            df = self._fetch_pages(dimensions, metrics, date_range, dimension_filter, limit, order_bys=order_bys)
+            if df is None:
+                print(f"  [ERROR] Rapor eksik kaldı, önbelleğe yazılmadı: {dimensions} {metrics}")
+                return pd.DataFrame()
+            if cache:
+                self._save_to_cache(cache_key, df, spec)
+            return df
+
+        return self._single_flight(cache_key, fetch)
+
+    def iter_report(self, dimensions, metrics, date_range, dimension_filter=None, limit=100000, order_bys=None):
+        """Yield a report as Arrow RecordBatches, one per API page, instead of one DataFrame.
+
+        Only the page being consumed and the next one (requested while the
+        caller works on the current batch) are held in memory. The first
+        batch is yielded even when empty, so it always carries the schema.
+        A cached result is streamed from the cache; streamed results are not
+        written to it. Raises RuntimeError if a page fails mid-stream.
+        Synchronous client only (not AsyncAnalyticsHelper).
+        """
+        dimensions = self._with_range_dimension(dimensions, date_range)
+        cache_key = self._get_cache_key(dimensions, metrics, date_range, dimension_filter, limit, order_bys)
+        cached_df = self._load_from_cache(cache_key)
+        if cached_df is not None:
+            table = pa.Table.from_pandas(cached_df, preserve_index=False)
+            yield from table.to_batches(max_chunksize=self.page_size) or [pa.RecordBatch.from_pylist([], table.schema)]
+            return
+
+        def page(offset):
+            response = self._run_page(dimensions, metrics, date_range, dimension_filter, offset, limit, order_bys)
+            if response is None:
+                raise RuntimeError(f"Rapor sayfası alınamadı (offset {offset}): {dimensions} {metrics}")
+            return response
+
+        response = page(0)
+        remaining = min(response.row_count, limit) if limit else response.row_count
+        offsets = self._remaining_offsets(response.row_count, limit)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            upcoming = pool.submit(page, offsets[0]) if offsets else None
+            for i in range(len(offsets) + 1):
+                columns = self._decode_columns(response, dimensions, metrics)
+                for name in CATEGORICAL_DIMENSIONS.intersection(dimensions):
+                    columns[name] = pa.array(columns[name], pa.string()).dictionary_encode()
+                batch = pa.RecordBatch.from_pydict(columns)
+                batch = batch.slice(0, max(remaining, 0))
+                remaining -= batch.num_rows
+                response = None
+                yield batch
+                if i < len(offsets):
+                    response = upcoming.result()
+                    upcoming = pool.submit(page, offsets[i + 1]) if i + 1 < len(offsets) else None
+
+    def export_report(self, name, dimensions, metrics, date_range, dimension_filter=None, limit=100000,
+                      order_bys=None):
+        """Stream a report page by page into exported_data/{name}.parquet; returns the row count."""
+        path = os.path.join(self.data_export_dir, f"{name}.parquet")
+        rows = 0
+        writer = None
+        try:
+            for batch in self.iter_report(dimensions, metrics, date_range, dimension_filter, limit, order_bys):
+                if writer is None:
+                    writer = pq.ParquetWriter(path, batch.schema)
+                writer.write_batch(batch)
+                rows += batch.num_rows
+            print(f"  [SAVED] {name} -> {rows} rows")
+        except Exception as e:
+            print(f"  [ERROR saving {name}]: {e}")
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    def _with_range_dimension(self, dimensions, date_range):
+        """Add the dateRange dimension to a multi-range query (GA4 labels each row with its range)."""
+        if not isinstance(date_range, (list, tuple)):
+            return dimensions
+        if len(date_range) > DATE_RANGES_MAX:
+            raise ValueError(f"GA4 en fazla {DATE_RANGES_MAX} tarih aralığı kabul eder ({len(date_range)} verildi)")
+        return dimensions if "dateRange" in dimensions else list(dimensions) + ["dateRange"]
+
+    def split_date_ranges(self, df, date_ranges):
+        """Split a multi-range result into one frame per range (in order), without the dateRange column."""
+        labels = [r.name or f"date_range_{i}" for i, r in enumerate(date_ranges)]
+        if df.empty or "dateRange" not in df.columns:
+            return [pd.DataFrame() for _ in labels]
+        return [df[df["dateRange"] == label].drop(columns="dateRange").reset_index(drop=True) for label in labels]
+
+    def _single_flight(self, key, fetch):
+        """Run fetch() once per key at a time; concurrent callers for the same key share its result."""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if owner:
+            try:
+                future.set_result(fetch())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[key]
+        return future.result().copy(deep=False)
+
+    def run_batch(self, specs, cache=True):
+        """Fetch several queries with batchRunReports (up to 5 per call).
 
-        while True:
-            request = RunReportRequest(
+        Each spec is a dict of run_report keyword arguments. Cached specs are
+        served from cache; the rest are packed into batches and every response
+        is paged, cached and returned exactly as run_report would; with
+        cache=False the cache is neither read nor written.
+        Returns one DataFrame per spec, in order.
+        """
+        results = {}
+        pending = {}
+        spec_keys = []
+        for spec in specs:
+            spec = {"dimension_filter": None, "limit": 100000, "order_bys": None, **spec}
+            spec["dimensions"] = self._with_range_dimension(spec["dimensions"], spec["date_range"])
+            key = self._get_cache_key(spec["dimensions"], spec["metrics"], spec["date_range"],
+                                      spec["dimension_filter"], spec["limit"], spec["order_bys"])
+            spec_keys.append(key)
+            if key in results or key in pending:
+                continue
+            cached_df = self._load_from_cache(key) if cache else None
+            if cached_df is not None:
+                results[key] = cached_df
+            else:
+                pending[key] = spec
+
+        keys = list(pending)
+        for i in range(0, len(keys), BATCH_REPORTS_MAX):
+            chunk = keys[i:i + BATCH_REPORTS_MAX]
+            request = BatchRunReportsRequest(
                 property=self.property,
-                dimensions=[Dimension(name=d) for d in dimensions],
-                metrics=[Metric(name=m) for m in metrics],
-                date_ranges=[date_range],
-                dimension_filter=dimension_filter,
-                limit=batch_size,
-                offset=offset,
-                keep_empty_rows=True
+                requests=[self._build_request(pending[k]["dimensions"], pending[k]["metrics"],
+                                              pending[k]["date_range"], pending[k]["dimension_filter"],
+                                              self._page_limit(pending[k]["limit"]), 0,
+                                              pending[k]["order_bys"]) for k in chunk]
             )
             try:
-                response = self.client.run_report(request)
+                responses = list(self._call_api(self.client.batch_run_reports, request).reports)
             except Exception as e:
-                print(f"API Error in run_report (Offset {offset}): {e}")
-                break
+                print(f"API Error in batch_run_reports ({len(chunk)} rapor): {e}")
+                responses = [None] * len(chunk)
 
-            if not response.rows:
-                break
+            for key, response in zip(chunk, responses):
+                spec = pending[key]
+                df = self._fetch_pages(spec["dimensions"], spec["metrics"], spec["date_range"],
+                                       spec["dimension_filter"], spec["limit"], response=response,
+                                       order_bys=spec["order_bys"])
+                if df is None:
+                    print(f"  [ERROR] Rapor eksik kaldı, önbelleğe yazılmadı: {spec['dimensions']} {spec['metrics']}")
+                    results[key] = pd.DataFrame()
+                    continue
+                if cache:
+                    self._save_to_cache(key, df, spec)
+                results[key] = df
 
-            for row in response.rows:
-                item = {}
-                for i, d in enumerate(dimensions):
-                    item[d] = row.dimension_values[i].value
-                for i, m in enumerate(metrics):
-                    val = row.metric_values[i].value
-                    try:
-                        if '.' in val:
-                            item[m] = float(val)
-                        else:
-                            item[m] = int(val)
-                    except ValueError:
-                        item[m] = val
-                all_data.append(item)
-
-            fetched_count = len(response.rows)
-            total_fetched = len(all_data)
-
-            if fetched_count < batch_size:
-                break
+        if pending:
+            calls = (len(pending) + BATCH_REPORTS_MAX - 1) // BATCH_REPORTS_MAX
+            print(f"  [BATCH] {len(pending)} sorgu {calls} batchRunReports çağrısıyla çekildi")
 
-            if limit and total_fetched >= limit:
-                all_data = all_data[:limit]
-                break
+        return [results[key].copy(deep=False) for key in spec_keys]
+
+    def _realtime_request(self, dimensions, metrics, minutes_ago, end_minutes_ago):
+        return RunRealtimeReportRequest(
+            property=self.property,
+            dimensions=[Dimension(name=d) for d in dimensions],
+            metrics=[Metric(name=m) for m in metrics],
+            minute_ranges=[MinuteRange(start_minutes_ago=minutes_ago, end_minutes_ago=end_minutes_ago)],
+            return_property_quota=True
+        )
 
-            offset += batch_size
-            time.sleep(0.5)
+    def _realtime_frame(self, response, dimensions, metrics):
+        if not response.rows:
+            return pd.DataFrame(columns=list(dimensions) + list(metrics))
+        return pd.DataFrame(self._decode_columns(response, dimensions, metrics))
 
-        df = pd.DataFrame(all_data)
-        self._save_to_cache(cache_key, df)
-        return df
+    def run_realtime_report(self, dimensions, metrics, minutes_ago=REALTIME_MINUTES - 1, end_minutes_ago=0):
+        """Realtime report over the last minutes (never cached); empty frame on API error."""
+        request = self._realtime_request(dimensions, metrics, minutes_ago, end_minutes_ago)
+        try:
+            response = self._call_api(self.client.run_realtime_report, request)
+        except Exception as e:
+            print(f"API Error in run_realtime_report: {e}")
+            return pd.DataFrame()
+        return self._realtime_frame(response, dimensions, metrics)
+
+    def collect(self, collect_fn):
+        """Run collect_fn with queries recorded instead of executed; return the uncached specs."""
+        self._collecting = []
+        try:
+            collect_fn()
+        finally:
+            specs, self._collecting = self._collecting, None
+        return specs
+
+    def prefetch(self, collect_fn):
+        """Collect the queries collect_fn would make and batch-fetch the uncached ones.
+
+        collect_fn should make the same get_* calls the caller is about to make;
+        afterwards those calls are served from cache. Returns the number of
+        queries fetched.
+        """
+        specs = self.collect(collect_fn)
+        if specs:
+            self.run_batch(specs)
+        return len(specs)
+
+    def _resolve(self, specs, combine=None):
+        """Run run_report specs and hand the frames to combine (default: return the single frame).
+
+        Every get_* method goes through here, so AsyncAnalyticsHelper only has
+        to override this (and run_report) to make them awaitable.
+        """
+        frames = [self.run_report(**spec) for spec in specs]
+        return combine(*frames) if combine else frames[0]
+
+    def _query(self, dimensions, metrics, date_range, dimension_filter=None, limit=100000, post=None,
+               order_bys=None):
+        """Single-report shortcut for _resolve; post is applied to the resulting frame."""
+        spec = dict(dimensions=dimensions, metrics=metrics, date_range=date_range,
+                    dimension_filter=dimension_filter, limit=limit)
+        if order_bys:
+            spec["order_bys"] = order_bys
+        return self._resolve([spec], post)
 
     def get_daily_traffic(self, start_date="30daysAgo", end_date="today"):
         """Get daily sessions and users."""
-        return self.run_report(
+        return self._query(
             dimensions=["date"],
-            metrics=["activeUsers", "sessions", "screenPageViews", "engagementRate", "eventCount"],
+            metrics=["activeUsers", "sessions", "screenPageViews", "eventCount"],
             date_range=DateRange(start_date=start_date, end_date=end_date)
         )
 
+    def get_daily_traffic_ranges(self, ranges):
+        """get_daily_traffic for up to four (start, end) ranges in one request; one frame per range."""
+        date_ranges = [DateRange(start_date=start, end_date=end) for start, end in ranges]
+        return self._query(
+            dimensions=["date"],
+            metrics=["activeUsers", "sessions", "screenPageViews", "eventCount"],
+            date_range=date_ranges,
+            post=lambda df: self.split_date_ranges(df, date_ranges)
+        )
+
     def get_minutely_traffic(self, start_date="today", end_date="today"):
         """Get minute-level sessions and users for a single day."""
-        return self.run_report(
+        return self._query(
             dimensions=["dateHourMinute"],
             metrics=["activeUsers", "sessions", "screenPageViews", "eventCount"],
             date_range=DateRange(start_date=start_date, end_date=end_date)
         )
 
+    def get_live_minutely(self):
+        """Today's minute series (same columns as get_minutely_traffic), kept current via the Realtime API.
+
+        The first call of the day loads the full-day report once; later calls
+        only ask the Realtime API for the minutes since the previous poll (plus
+        the last, still open minute) and overwrite those slots of the in-memory
+        buffer. Realtime has no sessions metric, so minutes filled only by
+        polling keep sessions at 0 until the next full load.
+        """
+        if self._collecting is not None:
+            return self.get_minutely_traffic()
+
+        now = datetime.now().replace(second=0, microsecond=0)
+        if self._live is None or self._live["day"] != now.date():
+            self._live_reset(now, self.get_minutely_traffic())
+        minutes_ago = self._live_window(now)
+        return self._live_merge(now, minutes_ago, self.run_realtime_report(["minutesAgo"], REALTIME_METRICS,
+                                                                           minutes_ago=minutes_ago))
+
+    def _live_reset(self, now, seed):
+        """Start the day's live buffer from the full-day minute report."""
+        minutes = {}
+        if not seed.empty:
+            for row in seed.itertuples(index=False):
+                minutes[row.dateHourMinute] = [int(getattr(row, m)) for m in LIVE_METRICS]
+        # The standard report lags GA4 processing, so backfill the whole realtime window once
+        self._live = {"day": now.date(), "minutes": minutes,
+                      "polled_at": now - timedelta(minutes=REALTIME_MINUTES)}
+
+    def _live_window(self, now):
+        """minutesAgo to poll back to: the minutes since the previous poll, plus the still open one."""
+        return min(int((now - self._live["polled_at"]).total_seconds() // 60), REALTIME_MINUTES - 1)
+
+    def _live_merge(self, now, minutes_ago, df):
+        """Write a realtime minutesAgo frame into the live buffer and return the day's minute series."""
+        live = self._live
+        if not df.empty:
+            for row in df.itertuples(index=False):
+                minute = now - timedelta(minutes=int(row.minutesAgo))
+                if minute.date() != now.date():
+                    continue
+                slot = live["minutes"].setdefault(minute.strftime("%Y%m%d%H%M"), [0, 0, 0, 0])
+                slot[0], slot[2], slot[3] = int(row.activeUsers), int(row.screenPageViews), int(row.eventCount)
+            live["polled_at"] = now
+            print(f"  [LIVE] son {minutes_ago + 1} dakika güncellendi ({now:%H:%M})")
+
+        keys = sorted(live["minutes"])
+        df = pd.DataFrame([live["minutes"][k] for k in keys], columns=LIVE_METRICS)
+        df.insert(0, "dateHourMinute", keys)
+        return df
+
     def get_top_pages(self, start_date="2020-01-01", end_date="today", limit=50):
-        """Get top viewed pages."""
-        df = self.run_report(
+        """Get top viewed pages (GA4 returns the top `limit` by views)."""
+        return self._query(
             dimensions=["pageTitle", "pagePath"],
             metrics=["screenPageViews", "activeUsers"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
-            limit=limit
+            limit=limit,
+            order_bys=self._metric_order("screenPageViews")
         )
-        if not df.empty:
-            df = df.sort_values(by="screenPageViews", ascending=False).head(limit)
-        return df
 
     def get_countries(self, start_date="2020-01-01", end_date="today"):
         """Get traffic by country."""
-        return self.run_report(
+        return self._query(
             dimensions=["country"],
             metrics=["activeUsers", "screenPageViews"],
             date_range=DateRange(start_date=start_date, end_date=end_date)
         )
 
     def get_tr_cities(self, start_date="2020-01-01", end_date="today"):
-        """Get traffic by ALL Turkish cities (no limit)."""
-        df = self.run_report(
+        """Get traffic by ALL Turkish cities (no limit); the country filter runs in GA4."""
+        turkey_filter = FilterExpression(
+            filter=Filter(
+                field_name="country",
+                in_list_filter=Filter.InListFilter(values=["Turkey", "Türkiye", "Turkiye"], case_sensitive=False)
+            )
+        )
+        return self._query(
             dimensions=["city", "country"],
             metrics=["activeUsers", "screenPageViews"],
-            date_range=DateRange(start_date=start_date, end_date=end_date)
+            date_range=DateRange(start_date=start_date, end_date=end_date),
+            dimension_filter=turkey_filter
         )
-        if not df.empty:
-            df = df[df['country'].astype(str).str.lower().isin(['turkey', 'türkiye', 'turkiye'])]
-        return df
 
     def get_traffic_sources(self, start_date="2020-01-01", end_date="today"):
         """Get session traffic sources."""
-        return self.run_report(
+        return self._query(
             dimensions=["sessionDefaultChannelGroup"],
             metrics=["sessions", "activeUsers"],
             date_range=DateRange(start_date=start_date, end_date=end_date)
@@ -198,36 +896,47 @@ class AnalyticsHelper:
         dims = ["sessionDefaultChannelGroup"]
         if over_time:
             dims.append("date")
-        return self.run_report(
+        return self._query(
             dimensions=dims,
             metrics=["sessions", "activeUsers"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
             limit=10000
         )
 
+    def _merge_events(self, df_main, df_events, keys):
+        """Add click / file_download event counts (pivoted from df_events) to df_main on keys."""
+        if not df_events.empty:
+            df_pivot = df_events.pivot_table(index=keys, columns='eventName', values='eventCount',
+                                             aggfunc='sum', observed=True).reset_index().fillna(0)
+            df_pivot.columns = [str(c) for c in df_pivot.columns]
+            df_main = df_main.merge(df_pivot, on=keys, how='left')
+        for event in ['click', 'file_download']:
+            df_main[event] = df_main[event].fillna(0) if event in df_main.columns else 0
+        return df_main
+
     def get_grouped_top_pages(self, path_prefix, start_date="2020-01-01", end_date="today", limit=20):
         """Get top pages filtered by a path prefix (e.g. /category/guncel)."""
-        path_filter = FilterExpression(
-            filter=Filter(
-                field_name="pagePath",
-                string_filter=Filter.StringFilter(
-                    value=path_prefix,
-                    match_type=Filter.StringFilter.MatchType.BEGINS_WITH
-                )
-            )
-        )
+        def combine(df_main, df_events):
+            if df_main.empty:
+                return pd.DataFrame()
+            df_main = self._merge_events(df_main, df_events, ['pagePath'])
+            return df_main.sort_values(by="screenPageViews", ascending=False).head(limit)
+
+        return self._resolve(self._top_pages_specs(path_prefix, start_date, end_date, limit), combine)
+
+    def _top_pages_specs(self, path_prefix, start_date, end_date, limit):
+        """Main + events specs of a group's server-side top-N pages over one date range."""
+        path_filter = self._make_prefix_filter([path_prefix])
 
-        df_main = self.run_report(
+        main_spec = dict(
             dimensions=["pageTitle", "pagePath"],
             metrics=["screenPageViews", "activeUsers", "scrolledUsers"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
             dimension_filter=path_filter,
-            limit=limit
+            limit=limit,
+            order_bys=self._metric_order("screenPageViews")
         )
 
-        if df_main.empty:
-            return pd.DataFrame()
-
         # Specific Events (click, file_download)
         events_filter = FilterExpression(
             and_group=FilterExpressionList(
@@ -246,27 +955,51 @@ class AnalyticsHelper:
             )
         )
 
-        df_events = self.run_report(
+        # Every page of the group, not a top-N: the top pages by views aren't the top pages by
+        # events, and a cut here would report 0 clicks for selected pages that fall outside it
+        events_spec = dict(
             dimensions=["pagePath", "eventName"],
             metrics=["eventCount"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
             dimension_filter=events_filter,
-            limit=limit * 5
         )
+        return [main_spec, events_spec]
 
-        if not df_events.empty:
-            df_pivot = df_events.pivot(index='pagePath', columns='eventName', values='eventCount').fillna(0)
-            df_main = df_main.merge(df_pivot, on='pagePath', how='left')
-            if 'click' in df_main.columns: df_main['click'] = df_main['click'].fillna(0)
-            else: df_main['click'] = 0
-            if 'file_download' in df_main.columns: df_main['file_download'] = df_main['file_download'].fillna(0)
-            else: df_main['file_download'] = 0
-        else:
-            df_main['click'] = 0
-            df_main['file_download'] = 0
+    def _month_ranges(self, start_date, end_date):
+        """(yearMonth, first day, last day) of every calendar month the range touches, clipped to it."""
+        start, end = resolve_date(start_date), resolve_date(end_date)
+        months = []
+        first = start
+        while first <= end:
+            next_month = (first.replace(day=1) + timedelta(days=32)).replace(day=1)
+            last = min(next_month - timedelta(days=1), end)
+            months.append((first.strftime("%Y%m"), first.isoformat(), last.isoformat()))
+            first = next_month
+        return months
 
-        df_main = df_main.sort_values(by="screenPageViews", ascending=False).head(limit)
-        return df_main
+    def get_grouped_monthly_top_pages(self, path_prefix, start_date="2020-01-01", end_date="today", top_n=5):
+        """Top top_n pages of a group for every month, ranked by GA4 (get_grouped_monthly_pages, headed per month).
+
+        One ordered top_n report per month (plus its events report), sent
+        together through batchRunReports, instead of every month x page row.
+        """
+        months = self._month_ranges(start_date, end_date)
+        specs = [spec for _, first, last in months
+                 for spec in self._top_pages_specs(path_prefix, first, last, top_n)]
+
+        def combine(*frames):
+            tables = []
+            for (year_month, _, _), df_main, df_events in zip(months, frames[::2], frames[1::2]):
+                if df_main.empty:
+                    continue
+                df_main = self._merge_events(df_main, df_events, ['pagePath'])
+                df_main.insert(0, "yearMonth", year_month)
+                tables.append(df_main.sort_values(by="screenPageViews", ascending=False).head(top_n))
+            if not tables:
+                return pd.DataFrame()
+            return pd.concat(tables).sort_values(by="yearMonth", ascending=False, kind="stable").reset_index(drop=True)
+
+        return self._resolve(specs, combine)
 
     def get_grouped_monthly_pages(self, path_prefix, start_date="2020-01-01", end_date="today"):
         """Get monthly top pages for a specific group."""
@@ -280,7 +1013,7 @@ class AnalyticsHelper:
             )
         )
 
-        df_main = self.run_report(
+        main_spec = dict(
             dimensions=["yearMonth", "pageTitle", "pagePath"],
             metrics=["screenPageViews", "activeUsers", "scrolledUsers"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
@@ -288,9 +1021,6 @@ class AnalyticsHelper:
             limit=10000
         )
 
-        if df_main.empty:
-            return pd.DataFrame()
-
         events_filter = FilterExpression(
             and_group=FilterExpressionList(
                 expressions=[
@@ -308,7 +1038,7 @@ class AnalyticsHelper:
             )
         )
 
-        df_events = self.run_report(
+        events_spec = dict(
             dimensions=["yearMonth", "pagePath", "eventName"],
             metrics=["eventCount"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
@@ -316,19 +1046,13 @@ class AnalyticsHelper:
             limit=20000
         )
 
-        if not df_events.empty:
-            df_pivot = df_events.pivot(index=['yearMonth', 'pagePath'], columns='eventName', values='eventCount').reset_index().fillna(0)
-            df_main = df_main.merge(df_pivot, on=['yearMonth', 'pagePath'], how='left')
-            if 'click' in df_main.columns: df_main['click'] = df_main['click'].fillna(0)
-            else: df_main['click'] = 0
-            if 'file_download' in df_main.columns: df_main['file_download'] = df_main['file_download'].fillna(0)
-            else: df_main['file_download'] = 0
-        else:
-            df_main['click'] = 0
-            df_main['file_download'] = 0
+        def combine(df_main, df_events):
+            if df_main.empty:
+                return pd.DataFrame()
+            df_main = self._merge_events(df_main, df_events, ['yearMonth', 'pagePath'])
+            return df_main.sort_values(by=["yearMonth", "screenPageViews"], ascending=[False, False])
 
-        df_main = df_main.sort_values(by=["yearMonth", "screenPageViews"], ascending=[False, False])
-        return df_main
+        return self._resolve([main_spec, events_spec], combine)
 
     def get_grouped_yearly_stats(self, path_prefix, start_date="2020-01-01", end_date="today"):
         """Get total sessions for a group broken down by year."""
@@ -341,13 +1065,123 @@ class AnalyticsHelper:
                 )
             )
         )
-        return self.run_report(
+        return self._query(
             dimensions=["year"],
             metrics=["sessions", "activeUsers", "screenPageViews"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
             dimension_filter=path_filter
         )
 
+    def _make_prefix_filter(self, prefixes):
+        """pagePath BEGINS_WITH any of the prefixes."""
+        expressions = [
+            FilterExpression(
+                filter=Filter(
+                    field_name="pagePath",
+                    string_filter=Filter.StringFilter(
+                        value=prefix,
+                        match_type=Filter.StringFilter.MatchType.BEGINS_WITH
+                    )
+                )
+            )
+            for prefix in prefixes
+        ]
+        if len(expressions) == 1:
+            return expressions[0]
+        return FilterExpression(or_group=FilterExpressionList(expressions=expressions))
+
+    def _grouped_specs(self, groups, dimensions, start_date, end_date):
+        """Page-level main + events specs covering every group's prefix in one query each."""
+        path_filter = self._make_prefix_filter([g["prefix"] for g in groups])
+        events_filter = FilterExpression(
+            and_group=FilterExpressionList(
+                expressions=[
+                    path_filter,
+                    FilterExpression(
+                        filter=Filter(
+                            field_name="eventName",
+                            in_list_filter=Filter.InListFilter(
+                                values=["click", "file_download"],
+                                case_sensitive=False
+                            )
+                        )
+                    )
+                ]
+            )
+        )
+        main_spec = dict(
+            dimensions=dimensions + ["pageTitle", "pagePath"],
+            metrics=["screenPageViews", "activeUsers", "scrolledUsers"],
+            date_range=DateRange(start_date=start_date, end_date=end_date),
+            dimension_filter=path_filter
+        )
+        events_spec = dict(
+            dimensions=dimensions + ["pagePath", "eventName"],
+            metrics=["eventCount"],
+            date_range=DateRange(start_date=start_date, end_date=end_date),
+            dimension_filter=events_filter
+        )
+        return [main_spec, events_spec]
+
+    def get_all_grouped_top_pages(self, groups, start_date="2020-01-01", end_date="today", limit=20):
+        """get_grouped_top_pages for every group ({"name", "prefix"} dicts) from two queries in total.
+
+        Returns {group name: DataFrame}; a page under several prefixes counts in each.
+        """
+        trie = PrefixTrie(groups)
+
+        def combine(df_main, df_events):
+            if df_main.empty:
+                return {g["name"]: pd.DataFrame() for g in groups}
+            df = trie.classify(self._merge_events(df_main, df_events, ['pagePath']))
+            df = df.sort_values(by="screenPageViews", ascending=False)
+            tables = {name: part.drop(columns="group").head(limit).reset_index(drop=True)
+                      for name, part in df.groupby("group", sort=False)}
+            return {g["name"]: tables.get(g["name"], pd.DataFrame()) for g in groups}
+
+        return self._resolve(self._grouped_specs(groups, [], start_date, end_date), combine)
+
+    def get_all_grouped_monthly_pages(self, groups, start_date="2020-01-01", end_date="today"):
+        """get_grouped_monthly_pages for every group from two queries in total; {group name: DataFrame}."""
+        trie = PrefixTrie(groups)
+
+        def combine(df_main, df_events):
+            if df_main.empty:
+                return {g["name"]: pd.DataFrame() for g in groups}
+            df = trie.classify(self._merge_events(df_main, df_events, ['yearMonth', 'pagePath']))
+            df = df.sort_values(by=["yearMonth", "screenPageViews"], ascending=[False, False])
+            tables = {name: part.drop(columns="group").reset_index(drop=True)
+                      for name, part in df.groupby("group", sort=False)}
+            return {g["name"]: tables.get(g["name"], pd.DataFrame()) for g in groups}
+
+        return self._resolve(self._grouped_specs(groups, ["yearMonth"], start_date, end_date), combine)
+
+    def get_all_grouped_yearly_stats(self, groups, start_date="2020-01-01", end_date="today"):
+        """Yearly totals per group from one year x pagePath query; {group name: DataFrame}.
+
+        Views are exact. Sessions and users are summed over the group's pages,
+        so a session or user that saw several pages of a group counts once per
+        page (get_grouped_yearly_stats counts them once).
+        """
+        trie = PrefixTrie(groups)
+        metrics = ["sessions", "activeUsers", "screenPageViews"]
+
+        def combine(df):
+            if df.empty:
+                return {g["name"]: pd.DataFrame() for g in groups}
+            df = trie.classify(df)
+            tables = {name: part.groupby("year", as_index=False)[metrics].sum()
+                      for name, part in df.groupby("group", sort=False)}
+            return {g["name"]: tables.get(g["name"], pd.DataFrame()) for g in groups}
+
+        return self._query(
+            dimensions=["year", "pagePath"],
+            metrics=metrics,
+            date_range=DateRange(start_date=start_date, end_date=end_date),
+            dimension_filter=self._make_prefix_filter([g["prefix"] for g in groups]),
+            post=combine
+        )
+
     def _make_path_filter(self, paths):
         """Create a dimension filter for one or more pagePaths."""
         if isinstance(paths, str):
@@ -372,22 +1206,75 @@ class AnalyticsHelper:
                 )
             )
 
+    def get_page_totals(self, paths, start_date="2020-01-01", end_date="today"):
+        """Get aggregate views, users and sessions for specific page(s)."""
+        pf = self._make_path_filter(paths)
+        return self._query(
+            dimensions=[],
+            metrics=["screenPageViews", "activeUsers", "sessions"],
+            date_range=DateRange(start_date=start_date, end_date=end_date),
+            dimension_filter=pf
+        )
+
     def get_page_minutely(self, paths, start_date="2020-01-01", end_date="today"):
         """Get minute-level traffic for specific page(s)."""
         pf = self._make_path_filter(paths)
-        return self.run_report(
+        return self._query(
             dimensions=["dateHourMinute"],
             metrics=["activeUsers", "sessions", "screenPageViews", "eventCount"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
             dimension_filter=pf
         )
 
+    def get_page_daily(self, paths, start_date="2020-01-01", end_date="today"):
+        """Get daily traffic for specific page(s)."""
+        return self._query(
+            dimensions=["date"],
+            metrics=PAGE_BREAKDOWNS["daily"]["metrics"],
+            date_range=DateRange(start_date=start_date, end_date=end_date),
+            dimension_filter=self._make_path_filter(paths)
+        )
+
+    def time_grain(self, start_date, end_date, points=CHART_POINTS):
+        """The finest TIME_GRAINS entry whose buckets cover start_date..end_date in at most `points` points."""
+        days = (resolve_date(end_date) - resolve_date(start_date)).days + 1
+        for grain in TIME_GRAINS:
+            if days * pd.Timedelta(days=1) / pd.Timedelta(grain["bucket"]) <= points:
+                return grain
+        return TIME_GRAINS[-1]
+
+    def resample_timeseries(self, df, grain):
+        """Sum a frame keyed by grain's time dimension into its buckets; returns time + metric columns."""
+        dimension = grain["dimension"]
+        if df.empty or dimension not in df.columns:
+            return pd.DataFrame()
+        df = df.copy()
+        df["time"] = pd.to_datetime(df[dimension], format=grain["format"])
+        metrics = [c for c in df.columns if c not in (dimension, "time")]
+        df[metrics] = df[metrics].astype(int)
+        return df.set_index("time")[metrics].resample(grain["bucket"]).sum().reset_index()
+
+    def get_page_timeseries(self, paths, start_date, end_date, points=CHART_POINTS):
+        """Traffic of specific page(s) over start_date..end_date at the grain time_grain picks.
+
+        Only as fine a time dimension as the chart can show is requested, so a
+        page's lifetime comes back as days or hours instead of every minute.
+        """
+        grain = self.time_grain(start_date, end_date, points)
+        return self._query(
+            dimensions=[grain["dimension"]],
+            metrics=PAGE_BREAKDOWNS["daily"]["metrics"],
+            date_range=DateRange(start_date=start_date, end_date=end_date),
+            dimension_filter=self._make_path_filter(paths),
+            post=lambda df: self.resample_timeseries(df, grain)
+        )
+
     def get_page_sources(self, paths, start_date="2020-01-01", end_date="today"):
         """Get traffic sources for specific page(s)."""
         pf = self._make_path_filter(paths)
-        return self.run_report(
+        return self._query(
             dimensions=["sessionDefaultChannelGroup"],
-            metrics=["sessions", "activeUsers", "screenPageViews"],
+            metrics=PAGE_BREAKDOWNS["sources"]["metrics"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
             dimension_filter=pf
         )
@@ -395,9 +1282,9 @@ class AnalyticsHelper:
     def get_page_countries(self, paths, start_date="2020-01-01", end_date="today"):
         """Get country breakdown for specific page(s)."""
         pf = self._make_path_filter(paths)
-        return self.run_report(
+        return self._query(
             dimensions=["country"],
-            metrics=["activeUsers", "screenPageViews"],
+            metrics=PAGE_BREAKDOWNS["countries"]["metrics"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
             dimension_filter=pf
         )
@@ -405,13 +1292,36 @@ class AnalyticsHelper:
     def get_page_cities(self, paths, start_date="2020-01-01", end_date="today"):
         """Get city breakdown for specific page(s)."""
         pf = self._make_path_filter(paths)
-        df = self.run_report(
+        return self._query(
             dimensions=["city", "country"],
-            metrics=["activeUsers", "screenPageViews"],
+            metrics=PAGE_BREAKDOWNS["cities"]["metrics"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
             dimension_filter=pf
         )
-        return df
+
+    def get_pages_bulk(self, paths, breakdown, start_date="2020-01-01", end_date="today"):
+        """Get one PAGE_BREAKDOWNS breakdown for many pages at once, with pagePath as an extra dimension."""
+        spec = PAGE_BREAKDOWNS[breakdown]
+        return self._query(
+            dimensions=["pagePath"] + spec["dimensions"],
+            metrics=spec["metrics"],
+            date_range=DateRange(start_date=start_date, end_date=end_date),
+            dimension_filter=self._make_path_filter(sorted(set(paths)))
+        )
+
+    def slice_pages_bulk(self, df, breakdown, paths):
+        """Cut the rows of one or more pages out of a get_pages_bulk frame and sum them per breakdown dimension."""
+        paths = [paths] if isinstance(paths, str) else list(paths)
+        dims = PAGE_BREAKDOWNS[breakdown]["dimensions"]
+        metrics = PAGE_BREAKDOWNS[breakdown]["metrics"]
+        if df.empty:
+            return pd.DataFrame()
+        part = df[df["pagePath"].isin(paths)]
+        if part.empty:
+            return pd.DataFrame()
+        if not dims:
+            return part[metrics].sum().to_frame().T
+        return part.groupby(dims, as_index=False, sort=False, observed=True)[metrics].sum()
 
     def get_downloads(self, start_date="2020-01-01", end_date="today", limit=50):
         """Get top file downloads."""
@@ -421,15 +1331,175 @@ class AnalyticsHelper:
                 string_filter=Filter.StringFilter(value="file_download")
             )
         )
-        return self.run_report(
+        return self._query(
             dimensions=["fileName", "linkUrl"],
             metrics=["eventCount"],
             date_range=DateRange(start_date=start_date, end_date=end_date),
             dimension_filter=download_filter,
-            limit=limit
+            limit=limit,
+            order_bys=self._metric_order("eventCount")
         )
 
 
+class AsyncAnalyticsHelper(AnalyticsHelper):
+    """Asyncio variant of AnalyticsHelper backed by BetaAnalyticsDataAsyncClient.
+
+    Exposes the same get_* methods as coroutines and keeps at most
+    max_concurrency requests in flight. The on-disk cache is shared with
+    AnalyticsHelper, so cached queries never touch the network.
+    """
+
+    def __init__(self, max_concurrency=8, client=None, prop=None):
+        self.max_concurrency = max_concurrency
+        self._loop_state = None
+        self._inflight_async = {}
+        # A synchronous client (a ga4_replay.py stand-in, or a live client shared between
+        # properties) is driven through AsyncClientAdapter
+        super().__init__(client=client if client is not None else client_from_env(), prop=prop)
+
+    def _create_client(self):
+        # The async client and semaphore are bound to an event loop, see _state()
+        return None
+
+    def _state(self):
+        """Return (client, semaphore) for the running event loop, creating them on first use."""
+        loop = asyncio.get_running_loop()
+        if self._loop_state is None or self._loop_state[0] is not loop:
+            client = AsyncClientAdapter(self.client) if self.client is not None else BetaAnalyticsDataAsyncClient()
+            self._loop_state = (loop, client, asyncio.Semaphore(self.max_concurrency))
+        return self._loop_state[1], self._loop_state[2]
+
+    async def _call_api(self, call, request):
+        """Async counterpart of AnalyticsHelper._call_api; only the request itself holds the semaphore."""
+        _, semaphore = self._state()
+        for attempt in range(API_RETRIES + 1):
+            await asyncio.sleep(self.limiter.reserve())
+            try:
+                async with semaphore:
+                    response = await call(request)
+            except RETRYABLE_ERRORS as e:
+                if attempt == API_RETRIES:
+                    raise
+                wait = self.limiter.backoff(attempt)
+                print(f"  [RETRY] {type(e).__name__}, {wait:.1f}s sonra tekrar ({attempt + 1}/{API_RETRIES})")
+                await asyncio.sleep(wait)
+            else:
+                _observe_quota(self.limiter, response)
+                return response
+
+    async def _run_page(self, dimensions, metrics, date_range, dimension_filter, offset, limit=None, order_bys=None):
+        client, _ = self._state()
+        request = self._build_request(dimensions, metrics, date_range, dimension_filter, self._page_limit(limit),
+                                      offset, order_bys)
+        try:
+            return await self._call_api(client.run_report, request)
+        except Exception as e:
+            print(f"API Error in run_report (Offset {offset}): {e}")
+            return None
+
+    async def _fetch_pages(self, dimensions, metrics, date_range, dimension_filter=None, limit=100000, response=None,
+                           order_bys=None):
+        """Async counterpart of AnalyticsHelper._fetch_pages."""
+        if response is None:
+            response = await self._run_page(dimensions, metrics, date_range, dimension_filter, 0, limit, order_bys)
+            if response is None:
+                return None
+
+        offsets = self._remaining_offsets(response.row_count, limit)
+        pages = [response] + list(await asyncio.gather(
+            *[self._run_page(dimensions, metrics, date_range, dimension_filter, off, limit, order_bys)
+              for off in offsets]))
+        return self._to_frame(pages, dimensions, metrics, limit, bool(offsets))
+
+    async def run_report(self, dimensions, metrics, date_range, dimension_filter=None, limit=100000, cache=True,
+                         order_bys=None):
+        """Awaitable run_report with the same caching as AnalyticsHelper.run_report."""
+        dimensions = self._with_range_dimension(dimensions, date_range)
+        cache_key = self._get_cache_key(dimensions, metrics, date_range, dimension_filter, limit, order_bys)
+        spec = dict(dimensions=dimensions, metrics=metrics, date_range=date_range,
+                    dimension_filter=dimension_filter, limit=limit)
+        if order_bys:
+            spec["order_bys"] = order_bys
+        if self._collecting is not None:
+            if not self._is_cached(cache_key):
+                self._collecting.append(spec)
+            return pd.DataFrame()
+
+        cached_df = self._load_from_cache(cache_key) if cache else None
+        if cached_df is not None:
+            return cached_df
+
+        async def fetch():
+            df = await self._fetch_pages(dimensions, metrics, date_range, dimension_filter, limit, order_bys=order_bys)
+            if df is None:
+                print(f"  [ERROR] Rapor eksik kaldı, önbelleğe yazılmadı: {dimensions} {metrics}")
+                return pd.DataFrame()
+            if cache:
+                self._save_to_cache(cache_key, df, spec)
+            return df
+
+        # Single flight: identical queries already in flight share one API call
+        task = self._inflight_async.get(cache_key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = self._inflight_async[cache_key] = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda t: self._inflight_async.pop(cache_key, None)
+                                   if self._inflight_async.get(cache_key) is t else None)
+        return (await asyncio.shield(task)).copy(deep=False)
+
+    async def run_realtime_report(self, dimensions, metrics, minutes_ago=REALTIME_MINUTES - 1, end_minutes_ago=0):
+        """Awaitable run_realtime_report (never cached); empty frame on API error."""
+        client, _ = self._state()
+        request = self._realtime_request(dimensions, metrics, minutes_ago, end_minutes_ago)
+        try:
+            response = await self._call_api(client.run_realtime_report, request)
+        except Exception as e:
+            print(f"API Error in run_realtime_report: {e}")
+            return pd.DataFrame()
+        return self._realtime_frame(response, dimensions, metrics)
+
+    async def get_live_minutely(self):
+        """Awaitable get_live_minutely."""
+        if self._collecting is not None:
+            return await self.get_minutely_traffic()
+
+        now = datetime.now().replace(second=0, microsecond=0)
+        if self._live is None or self._live["day"] != now.date():
+            self._live_reset(now, await self.get_minutely_traffic())
+        minutes_ago = self._live_window(now)
+        return self._live_merge(now, minutes_ago, await self.run_realtime_report(["minutesAgo"], REALTIME_METRICS,
+                                                                                 minutes_ago=minutes_ago))
+
+    async def run_specs(self, specs):
+        """Run run_report specs concurrently; returns one DataFrame per spec."""
+        return await asyncio.gather(*[self.run_report(**spec) for spec in specs])
+
+    async def _resolve(self, specs, combine=None):
+        frames = await self.run_specs(specs)
+        return combine(*frames) if combine else frames[0]
+
+    def run_batch(self, specs, cache=True):
+        """Synchronous entry point: fetch specs concurrently instead of via batchRunReports."""
+        return asyncio.run(self.run_specs([{**spec, "cache": cache} for spec in specs]))
+
+    def collect(self, collect_fn):
+        """Collect specs; the get_* coroutines collect_fn returns (alone or in lists/tuples) are awaited."""
+        async def drive():
+            pending = [collect_fn()]
+            while pending:
+                item = pending.pop()
+                if isinstance(item, (list, tuple)):
+                    pending.extend(item)
+                elif asyncio.iscoroutine(item):
+                    await item
+
+        self._collecting = []
+        try:
+            asyncio.run(drive())
+        finally:
+            specs, self._collecting = self._collecting, None
+        return specs
+
+
 if __name__ == "__main__":
     # Quick Test
     helper = AnalyticsHelper()
@@ -442,7 +1512,7 @@ if __name__ == "__main__":
     if not df_daily.empty:
         print(f"  {len(df_daily)} gün veri bulundu")
         print(df_daily.head())
-        helper.save_data(df_daily, "test_daily_traffic")
+        helper.save_data(df_daily, "test_daily_traffic", "30daysAgo", "today")
     else:
         print("  Veri bulunamadı!")
 
@@ -450,13 +1520,13 @@ if __name__ == "__main__":
     df_countries = helper.get_countries(start_date="2020-01-01")
     if not df_countries.empty:
         print(df_countries.sort_values(by="activeUsers", ascending=False).head(10))
-        helper.save_data(df_countries, "test_countries")
+        helper.save_data(df_countries, "test_countries", "2020-01-01", "today", page="test")
 
     print("\n--- Tüm TR Şehirleri ---")
     df_cities = helper.get_tr_cities(start_date="2020-01-01")
     if not df_cities.empty:
         print(f"  {len(df_cities)} şehir bulundu")
         print(df_cities.sort_values(by="activeUsers", ascending=False).head(10))
-        helper.save_data(df_cities, "test_tr_cities")
+        helper.save_data(df_cities, "test_tr_cities", "2020-01-01", "today", page="test")
 
     print("\n=== Test Tamamlandı ===")
@@ -0,0 +1,93 @@
+"""
+Katman Portal - Multi-property dashboard builder
+Builds the dashboards of several GA4 properties (properties.json) concurrently
+in one process. Each property has its own quota pacing, cache folder
+(data_cache/<name>/), exports (exported_data/<name>/) and output folder
+(dashboard/<name>/); properties with the same credentials share one GA4 client.
+
+Kullanim:
+  python build_properties.py                  # properties.json'daki tum property'ler
+  python build_properties.py katman           # Yalnizca adi verilen property'ler
+  python build_properties.py --warm-up        # Sadece onbellek isitma, sayfa uretmez
+  python build_properties.py --async          # Sorgulari asyncio istemcisiyle paralel cek
+  python build_properties.py --excel          # exported_data/<ad>/ icine .xlsx de yaz
+"""
+import sys
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from google.analytics.data_v1beta import BetaAnalyticsDataClient
+from ga4_replay import client_from_env
+from generate_report import ReportGenerator
+
+PROPERTIES_FILE = "properties.json"
+MAX_PARALLEL = 4  # properties built at the same time
+
+
+class ClientPool:
+    """One GA4 client per credentials file, shared by every property that uses it."""
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, credentials=None):
+        with self._lock:
+            if credentials not in self._clients:
+                client = client_from_env()
+                if client is None:
+                    client = (BetaAnalyticsDataClient.from_service_account_file(credentials)
+                              if credentials else BetaAnalyticsDataClient())
+                self._clients[credentials] = client
+            return self._clients[credentials]
+
+
+def load_properties(path=PROPERTIES_FILE, names=None):
+    """Property configs from path: [{"name", "property_id", "credentials"?, "output_dir"?, ...}]."""
+    with open(path, encoding="utf-8") as f:
+        properties = json.load(f)
+    for prop in properties:
+        if not prop.get("name") or not prop.get("property_id"):
+            raise ValueError(f"{path}: her property icin 'name' ve 'property_id' gerekli: {prop}")
+    if names:
+        properties = [p for p in properties if p["name"] in names]
+    return properties
+
+
+def build(prop, pool, args):
+    """Build (or only warm up) one property's dashboard; returns seconds taken."""
+    start = time.time()
+    gen = ReportGenerator(max_concurrency=8 if "--async" in args else 0, use_facts="--no-facts" not in args,
+                          prop=prop, client=pool.get(prop.get("credentials")), excel="--excel" in args)
+    if "--warm-up" in args:
+        gen.warm_up()
+    else:
+        gen.generate_all_reports()
+    return time.time() - start
+
+
+def main():
+    args = [a for a in sys.argv[1:] if a.startswith("--")]
+    names = [a for a in sys.argv[1:] if not a.startswith("--")]
+    properties = load_properties(names=names)
+    if not properties:
+        print("Calistirilacak property yok")
+        return 1
+
+    pool = ClientPool()
+    print(f">>> {len(properties)} property: {', '.join(p['name'] for p in properties)}")
+    failed = []
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL, len(properties))) as executor:
+        futures = {p["name"]: executor.submit(build, p, pool, args) for p in properties}
+        for name, future in futures.items():
+            try:
+                print(f">>> [{name}] tamam - {future.result():.0f} saniye")
+            except Exception as e:
+                print(f">>> [{name}] HATA: {e}")
+                failed.append(name)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
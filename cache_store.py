@@ -0,0 +1,215 @@
+"""
+Katman Portal - GA4 query cache
+One Arrow IPC file per query under data_cache/, indexed by a SQLite manifest
+(query spec, resolved dates, rows, bytes, last access, expiry). Loads are
+memory-mapped and the cache is kept under a byte budget by LRU eviction.
+
+Kullanim:
+  python cache_store.py            # Onbellek ozetini goster
+  python cache_store.py --evict    # Butceyi asan / suresi dolmus kayitlari sil
+"""
+import os
+import sys
+import time
+import sqlite3
+import threading
+import pandas as pd
+import pyarrow as pa
+from contextlib import closing
+
+CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    spec TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    rows INTEGER,
+    bytes INTEGER,
+    created_at REAL,
+    last_access REAL,
+    expires_at REAL
+)
+"""
+
+
+class CacheStore:
+    """Arrow IPC files plus a SQLite manifest, evicted least-recently-used under max_bytes."""
+
+    def __init__(self, directory, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(directory, "manifest.sqlite")
+        self.lock_path = os.path.join(directory, "cache.lock")
+        os.makedirs(directory, exist_ok=True)
+        with self._db() as db:
+            db.execute(SCHEMA)
+
+    def _db(self):
+        """Short-lived connection; SQLite handles locking between threads and processes."""
+        conn = sqlite3.connect(self.manifest_path, timeout=30)
+        return _Transaction(conn)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".arrow")
+
+    def get(self, key):
+        """Return the cached DataFrame for key, or None if missing or expired."""
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def contains(self, key):
+        """Whether a fresh entry exists for key (manifest lookup only, no file read)."""
+        with self._db() as db:
+            row = db.execute("SELECT expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        return row is not None and (row[0] is None or time.time() < row[0])
+
+    def get_entry(self, key):
+        """Return (DataFrame, expires_at) for key, or None if missing or expired."""
+        with self._db() as db:
+            row = db.execute("SELECT expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[0] is not None and time.time() >= row[0]):
+                return None
+            db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        try:
+            with pa.memory_map(self._path(key), "r") as source:
+                return pa.ipc.open_file(source).read_all().to_pandas(), row[0]
+        except Exception as e:
+            print(f"Warning: Failed to load cache {self._path(key)}: {e}")
+            return None
+
+    def put(self, key, df, spec, start_date, end_date, expires_at):
+        """Write df for key and record it in the manifest, then evict down to the byte budget.
+
+        The file is written to a temporary name and renamed into place under
+        the cache lock, so readers never see a truncated file and parallel
+        processes sharing data_cache/ don't interleave writes.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            with FileLock(self.lock_path):
+                os.replace(tmp_path, path)
+                now = time.time()
+                with self._db() as db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, spec, start_date, end_date, len(df), os.path.getsize(path), now, now, expires_at)
+                    )
+                self.evict()
+        except Exception as e:
+            print(f"Warning: Failed to save cache {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def entries(self):
+        """The manifest as a DataFrame, most recently used first."""
+        with closing(sqlite3.connect(self.manifest_path, timeout=30)) as conn:
+            return pd.read_sql_query("SELECT * FROM entries ORDER BY last_access DESC", conn)
+
+    def evict(self, max_bytes=None):
+        """Drop expired entries, then least recently used ones until the cache fits max_bytes."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        now = time.time()
+        with self._db() as db:
+            rows = db.execute("SELECT key, bytes, expires_at FROM entries ORDER BY last_access").fetchall()
+            victims = {key for key, _, expires_at in rows if expires_at is not None and expires_at <= now}
+            total = sum(size for key, size, _ in rows if key not in victims)
+            for key, size, _ in rows:
+                if total <= max_bytes:
+                    break
+                if key not in victims:
+                    victims.add(key)
+                    total -= size
+            db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in victims])
+        for key in victims:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        return len(victims)
+
+    def clear(self):
+        """Remove every cached query."""
+        with FileLock(self.lock_path):
+            with self._db() as db:
+                keys = [r[0] for r in db.execute("SELECT key FROM entries")]
+                db.execute("DELETE FROM entries")
+            for key in keys:
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+
+
+class FileLock:
+    """Exclusive cross-process lock held on a lock file (fcntl on POSIX, msvcrt on Windows)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self):
+        self._fh = open(self.path, "a+b")
+        if os.name == "nt":
+            import msvcrt
+            self._fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 seconds, keep waiting
+                    time.sleep(0.1)
+        else:
+            import fcntl
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
+        return False
+
+
+class _Transaction:
+    """Context manager that commits (or rolls back) and always closes the connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+        return False
+
+
+if __name__ == "__main__":
+    store = CacheStore("data_cache")
+    if "--evict" in sys.argv[1:]:
+        print(f"{store.evict()} kayit silindi")
+    df = store.entries()
+    print(f"{len(df)} kayit, {df['bytes'].sum() / 1024 ** 2:.1f} MB" if not df.empty else "Onbellek bos")
+    if not df.empty:
+        print(df[["key", "start_date", "end_date", "rows", "bytes"]].head(20).to_string(index=False))
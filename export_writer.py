@@ -0,0 +1,110 @@
+"""
+Katman Portal - Background export writer
+Writes the frames passed to AnalyticsHelper.save_data into the Parquet
+warehouse (exported_data/warehouse/, see warehouse.py) on a worker thread,
+so page rendering doesn't wait for the disk. Frames whose content hasn't
+changed since the last run are skipped (content hashes in
+exported_data/export_hashes.json). Excel copies are written only when asked
+for; afterwards any report can be exported with `python warehouse.py ... --excel`.
+"""
+import os
+import json
+import atexit
+import hashlib
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from warehouse import Warehouse
+
+EXPORT_WORKERS = 2
+HASHES_FILE = "export_hashes.json"
+
+
+def frame_hash(df):
+    """Content hash of a frame: column names, dtypes and values (row order included, index ignored)."""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode("utf-8"))
+    if len(df.columns):
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ExportWriter:
+    """Upserts frames into the warehouse (and {name}.xlsx if excel) in the background, skipping unchanged ones."""
+
+    def __init__(self, directory, excel=False, max_workers=EXPORT_WORKERS):
+        self.directory = directory
+        self.excel = excel
+        self.warehouse = Warehouse(os.path.join(directory, "warehouse"))
+        self.hashes_path = os.path.join(directory, HASHES_FILE)
+        self.stats = {"written": 0, "skipped": 0, "failed": 0}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._pending = []
+        self._dirty = False
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.hashes_path, encoding="utf-8") as f:
+                self._hashes = json.load(f)
+        except (OSError, ValueError):
+            self._hashes = {}
+        atexit.register(self.flush)
+
+    def submit(self, df, report, start_date, end_date, page=None):
+        """Queue df as report for start_date..end_date (YYYY-MM-DD); returns False if it is unchanged.
+
+        page is the dashboard page the table belongs to (see Warehouse.write);
+        it also names the Excel copy, {report}_{page}.xlsx.
+        """
+        key = f"{report}/{page}/{start_date}/{end_date}" if page else f"{report}/{start_date}/{end_date}"
+        name = f"{report}_{page}" if page else f"{report}_{start_date}_{end_date}"
+        content = frame_hash(df)
+        xlsx_path = os.path.join(self.directory, name + ".xlsx")
+        with self._lock:
+            # The page's own file, not just the report: a rolling page moving on removes its old one
+            unchanged = self._hashes.get(key) == content and self.warehouse.has(report, start_date, end_date, page)
+            if unchanged and (not self.excel or os.path.exists(xlsx_path)):
+                self.stats["skipped"] += 1
+                return False
+            # The caller may keep changing its frame, so the writer gets its own copy
+            self._pending.append(self._pool.submit(self._write, df.copy(), report, start_date, end_date, page,
+                                                   key, content, xlsx_path, not unchanged))
+        return True
+
+    def _write(self, df, report, start_date, end_date, page, key, content, xlsx_path, upsert):
+        try:
+            parts = self.warehouse.write(df, report, start_date, end_date, page) if upsert else 0
+            if self.excel:
+                df.to_excel(xlsx_path, index=False)
+            with self._lock:
+                self._hashes[key] = content
+                self._dirty = True
+                self.stats["written"] += 1
+            print(f"  [SAVED] {key} -> {len(df)} rows, {parts} partitions")
+        except Exception as e:
+            with self._lock:
+                self._dirty = self._hashes.pop(key, None) is not None or self._dirty
+                self.stats["failed"] += 1
+            print(f"  [ERROR saving {key}]: {e}")
+
+    def flush(self):
+        """Wait for every queued write and store the content hashes; returns the stats."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+        with self._lock:
+            if not self._dirty:
+                return dict(self.stats)
+            self._dirty = False
+            try:
+                tmp_path = f"{self.hashes_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._hashes, f, indent=0, sort_keys=True)
+                os.replace(tmp_path, self.hashes_path)
+            except OSError as e:
+                print(f"Warning: Failed to save {self.hashes_path}: {e}")
+        return dict(self.stats)
+
+    def summary(self):
+        return f"{self.stats['written']} yazıldı, {self.stats['skipped']} değişmediği için atlandı"
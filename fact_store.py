@@ -0,0 +1,234 @@
+"""
+Katman Portal - Day-granular GA4 fact store
+Keeps date-level rows per dimension set under data_cache/facts/ and only
+fetches the days it does not have yet. Month, year and rolling-window views
+are derived locally with pandas groupbys.
+"""
+import os
+import json
+import pandas as pd
+from datetime import date, timedelta
+from google.analytics.data_v1beta.types import DateRange, FilterExpression, Filter
+from analytics_helper import resolve_date, encode_dimensions
+from cache_store import FileLock
+from query_planner import ADDITIVE_METRICS
+
+# Fact tables: date x dimensions -> metrics
+FACTS = {
+    "traffic": {
+        "dimensions": [],
+        "metrics": ["activeUsers", "sessions", "screenPageViews", "eventCount"],
+    },
+    "country": {
+        "dimensions": ["country"],
+        "metrics": ["activeUsers", "screenPageViews"],
+    },
+    "tr_city": {
+        "dimensions": ["city", "country"],
+        "metrics": ["activeUsers", "screenPageViews"],
+        "filter": FilterExpression(
+            filter=Filter(
+                field_name="country",
+                in_list_filter=Filter.InListFilter(values=["Turkey", "Türkiye", "Turkiye"], case_sensitive=False)
+            )
+        ),
+    },
+    "channel": {
+        "dimensions": ["sessionDefaultChannelGroup"],
+        "metrics": ["sessions", "activeUsers"],
+    },
+    "page": {
+        "dimensions": ["pageTitle", "pagePath"],
+        "metrics": ["screenPageViews", "activeUsers"],
+    },
+}
+
+VOLATILE_DAYS = 2  # today and yesterday are still changing in GA4, re-fetch them every run
+
+
+class FactStore:
+    """Date-level GA4 rows per fact table, fetched incrementally through an AnalyticsHelper.
+
+    Rollups sum the daily rows of the additive metrics only; user counts
+    are distinct over a period, so rollups take them from one GA4 query
+    over the whole range instead of adding up the days.
+    """
+
+    def __init__(self, helper, directory=None):
+        self.helper = helper
+        self.directory = directory or os.path.join(helper.cache_dir, "facts")
+        os.makedirs(self.directory, exist_ok=True)
+        self._frames = {}
+        self._covered = {}
+        self._fresh = {}  # volatile days already fetched in this run
+
+    def _paths(self, name):
+        base = os.path.join(self.directory, name)
+        return base + ".parquet", base + ".dates.json"
+
+    def _read(self, name):
+        """(rows, covered days) of a fact table as stored on disk."""
+        data_path, dates_path = self._paths(name)
+        df, covered = pd.DataFrame(), set()
+        if os.path.exists(data_path):
+            # Only the columns the fact still defines (a metric may have been dropped since)
+            fact = FACTS[name]
+            df = pd.read_parquet(data_path)
+            df = df[[c for c in ["date"] + fact["dimensions"] + fact["metrics"] if c in df.columns]]
+        if os.path.exists(dates_path):
+            with open(dates_path, encoding="utf-8") as f:
+                covered = set(json.load(f))
+        return df, covered
+
+    def _load(self, name):
+        if name not in self._frames:
+            try:
+                df, covered = self._read(name)
+            except Exception as e:
+                print(f"Warning: Failed to load facts {name}: {e}")
+                df, covered = pd.DataFrame(), set()
+            self._frames[name] = df
+            self._covered[name] = covered
+            self._fresh[name] = set()
+        return self._frames[name]
+
+    def _save(self, name):
+        """Write a fact table atomically (temp file + rename) under the store's file lock.
+
+        Another process (a --live loop next to a build) may have stored days
+        since this one loaded the table, so the files are re-read under the
+        lock and merged: days fetched by this process take its rows, every
+        other day keeps the rows on disk.
+        """
+        data_path, dates_path = self._paths(name)
+        suffix = f".{os.getpid()}.tmp"
+        try:
+            with FileLock(os.path.join(self.directory, "facts.lock")):
+                on_disk, covered = self._read(name)
+                df = self._frames[name]
+                fresh = {d.replace("-", "") for d in self._fresh[name]}
+                parts = [part for part in (on_disk[~on_disk["date"].isin(fresh)] if not on_disk.empty else on_disk,
+                                           df[df["date"].isin(fresh)] if not df.empty else df) if not part.empty]
+                if parts:
+                    # Categories differ between the parts, so concat falls back to strings; encode again
+                    df = pd.concat(parts, ignore_index=True).sort_values("date", ignore_index=True)
+                    df = encode_dimensions(df)
+                covered |= self._covered[name]
+                df.to_parquet(data_path + suffix, index=False)
+                with open(dates_path + suffix, "w", encoding="utf-8") as f:
+                    json.dump(sorted(covered), f)
+                os.replace(data_path + suffix, data_path)
+                os.replace(dates_path + suffix, dates_path)
+            self._frames[name], self._covered[name] = df, covered
+        except Exception as e:
+            print(f"Warning: Failed to save facts {name}: {e}")
+
+    def _days(self, start_date, end_date):
+        """Resolve a GA4 date range into the list of days it covers, clamped to today."""
+        start = resolve_date(start_date)
+        end = min(resolve_date(end_date), date.today())
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    def _missing_ranges(self, name, days):
+        """Group the days a fact table lacks into contiguous (start, end) ranges."""
+        self._load(name)
+        # Volatile days are never recorded as covered, so they are fetched once per run
+        have = self._covered[name] | self._fresh[name]
+        missing = [d for d in days if d.isoformat() not in have]
+        ranges = []
+        for d in missing:
+            if ranges and ranges[-1][1] == d - timedelta(days=1):
+                ranges[-1][1] = d
+            else:
+                ranges.append([d, d])
+        return ranges
+
+    def update(self, names, start_date, end_date):
+        """Fetch the missing days of the given fact tables (one batched round for all of them)."""
+        days = self._days(start_date, end_date)
+        specs, targets = [], []
+        for name in names:
+            fact = FACTS[name]
+            for start, end in self._missing_ranges(name, days):
+                specs.append(dict(
+                    dimensions=["date"] + fact["dimensions"],
+                    metrics=fact["metrics"],
+                    date_range=DateRange(start_date=start.isoformat(), end_date=end.isoformat()),
+                    dimension_filter=fact.get("filter"),
+                    limit=None,  # every row: a truncated range would be marked covered and never refetched
+                ))
+                targets.append((name, start, end))
+        if not specs:
+            return 0
+
+        volatile_from = date.today() - timedelta(days=VOLATILE_DAYS - 1)
+        frames = self.helper.run_batch(specs, cache=False)
+        for (name, start, end), df_new in zip(targets, frames):
+            if df_new.columns.empty:
+                continue  # failed fetch; the range stays missing and is retried
+            fetched = {(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)}
+            fetched_keys = {d.replace("-", "") for d in fetched}
+            df = self._frames[name]
+            if not df.empty:
+                df = df[~df["date"].isin(fetched_keys)]
+            df_new = df_new[df_new["date"].isin(fetched_keys)]
+            if not df_new.empty:
+                # Categories differ between the parts, so concat falls back to strings; encode again
+                df = pd.concat([df, df_new], ignore_index=True).sort_values("date", ignore_index=True)
+            self._frames[name] = encode_dimensions(df)
+            self._fresh[name] |= fetched
+            self._covered[name] |= {d for d in fetched if date.fromisoformat(d) < volatile_from}
+        for name in {t[0] for t in targets}:
+            self._save(name)
+        print(f"  [FACTS] {len(specs)} eksik tarih aralığı çekildi ({', '.join(sorted({t[0] for t in targets}))})")
+        return len(specs)
+
+    def frame(self, name, start_date, end_date):
+        """Date-level rows of a fact table for a GA4 date range, fetching missing days first."""
+        self.update([name], start_date, end_date)
+        df = self._frames[name]
+        if df.empty:
+            return pd.DataFrame()
+        days = self._days(start_date, end_date)
+        if not days:
+            return df.iloc[0:0].reset_index(drop=True)
+        lo, hi = days[0].strftime("%Y%m%d"), days[-1].strftime("%Y%m%d")
+        return df[(df["date"] >= lo) & (df["date"] <= hi)].reset_index(drop=True)
+
+    def rollup(self, name, start_date, end_date):
+        """Totals of a fact table over a date range (month, year, last 30 days ...) per dimension set.
+
+        Additive metrics are summed from the daily rows. The others (user
+        counts) come from a GA4 query over the whole range, which goes
+        through the helper's cache and is collected by prefetch like any
+        get_* call.
+        """
+        df = self.frame(name, start_date, end_date)
+        fact = FACTS[name]
+        dims = fact["dimensions"]
+        additive = [m for m in fact["metrics"] if m in ADDITIVE_METRICS]
+        distinct = [m for m in fact["metrics"] if m not in ADDITIVE_METRICS]
+        if df.empty:
+            sums = pd.DataFrame(columns=dims + additive)
+        elif dims:
+            sums = df.groupby(dims, as_index=False, sort=False, observed=True)[additive].sum()
+        else:
+            sums = df[additive].sum().to_frame().T
+        if not distinct:
+            return sums
+
+        users = self.helper.run_report(dimensions=dims, metrics=distinct,
+                                       date_range=DateRange(start_date=start_date, end_date=end_date),
+                                       dimension_filter=fact.get("filter"), limit=None)
+        if users.empty:
+            if df.empty:
+                return pd.DataFrame()
+            users = pd.DataFrame(columns=dims + distinct)
+        if not dims:
+            sums = pd.concat([sums.reset_index(drop=True), users[distinct].reset_index(drop=True)], axis=1)
+        else:
+            # Categories differ between the two frames, so join on the plain values
+            sums = sums.astype({d: str for d in dims}).merge(users.astype({d: str for d in dims}), on=dims, how="outer")
+        metrics = additive + distinct
+        sums[metrics] = sums[metrics].fillna(0).astype("int64")
+        return encode_dimensions(sums[dims + fact["metrics"]])
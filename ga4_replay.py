@@ -0,0 +1,363 @@
+"""
+Katman Portal - GA4 stand-in clients
+Drop-in replacements for BetaAnalyticsDataClient so the pipeline can run
+without credentials or network:
+
+  RecordingClient  forwards to the real client and saves every response
+  ReplayClient     answers from saved responses (optionally with latency)
+  SyntheticClient  generates deterministic data for any property size
+
+AnalyticsHelper picks one from the GA4_CLIENT environment variable:
+  GA4_CLIENT=record:ga4_recordings   python generate_report.py
+  GA4_CLIENT=replay:ga4_recordings   python generate_report.py
+  GA4_CLIENT=synthetic:5000          python generate_report.py   # 5000 pages
+GA4_LATENCY adds a simulated round trip (seconds) to replay/synthetic calls.
+
+Kullanim:
+  python ga4_replay.py [sayfa_sayisi]   # Sentetik veriyle fetch/decode olcumu
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import hashlib
+import numpy as np
+from datetime import timedelta
+from google.api_core import exceptions as api_exceptions
+from google.analytics.data_v1beta.types import (
+    RunReportRequest,
+    RunReportResponse,
+    RunRealtimeReportResponse,
+    BatchRunReportsResponse,
+    MetricType,
+    Filter,
+    DateRange,
+)
+
+SYNTHETIC_PAGES = 2000
+PAGE_ROWS_MAX = 250000
+TOKENS_PER_HOUR = 40000
+
+# Dimension domains for synthetic data; other dimensions get "<name>_<i>" values
+DIMENSION_VALUES = {
+    "country": ["Turkey", "Germany", "United States", "Netherlands", "United Kingdom", "France",
+                "Azerbaijan", "Russia", "Austria", "Belgium"],
+    "city": ["Istanbul", "Ankara", "Izmir", "Bursa", "Antalya", "Konya", "Adana", "Berlin", "(not set)"],
+    "sessionDefaultChannelGroup": ["Direct", "Organic Search", "Organic Social", "Referral", "Unassigned"],
+    "eventName": ["page_view", "session_start", "scroll", "click", "file_download", "user_engagement"],
+    "deviceCategory": ["mobile", "desktop", "tablet"],
+    "minutesAgo": [f"{m:02d}" for m in range(30)],
+}
+CATEGORIES = ["guncel", "turkiye", "dunya", "ekonomi", "kultur-sanat", "spor"]
+FLOAT_METRICS = {"engagementRate", "bounceRate", "sessionsPerUser"}
+SECONDS_METRICS = {"averageSessionDuration", "userEngagementDuration"}
+
+
+def _request_key(request):
+    """Stable file name for a request: method prefix plus a hash of its serialized bytes."""
+    kind = type(request).__name__.replace("Request", "")
+    return f"{kind}-{hashlib.md5(type(request).serialize(request)).hexdigest()}"
+
+
+class RecordingClient:
+    """Wraps a real client and writes every response to `directory` for ReplayClient."""
+
+    def __init__(self, client, directory="ga4_recordings"):
+        self.client = client
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _save(self, request, response):
+        path = os.path.join(self.directory, _request_key(request) + ".pb")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(type(response).serialize(response))
+        os.replace(tmp_path, path)
+
+    def run_report(self, request):
+        response = self.client.run_report(request)
+        self._save(request, response)
+        return response
+
+    def batch_run_reports(self, request):
+        # Stored per report, so a replay can answer the same queries batched or one by one
+        response = self.client.batch_run_reports(request)
+        for sub_request, report in zip(request.requests, response.reports):
+            self._save(sub_request, report)
+        return response
+
+    def run_realtime_report(self, request):
+        response = self.client.run_realtime_report(request)
+        self._save(request, response)
+        return response
+
+
+class ReplayClient:
+    """Answers requests from a RecordingClient directory; unknown requests raise NotFound."""
+
+    cache_namespace = "replay"
+
+    def __init__(self, directory="ga4_recordings", latency=0.0):
+        self.directory = directory
+        self.latency = latency
+
+    def _load(self, request, response_type):
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        path = os.path.join(self.directory, _request_key(request) + ".pb")
+        if not os.path.exists(path):
+            raise api_exceptions.NotFound(f"Kayıt yok: {path}")
+        with open(path, "rb") as f:
+            return response_type.deserialize(f.read())
+
+    def run_report(self, request):
+        return self._load(request, RunReportResponse)
+
+    def batch_run_reports(self, request):
+        return BatchRunReportsResponse(reports=[self._load(r, RunReportResponse) for r in request.requests])
+
+    def run_realtime_report(self, request):
+        return self._load(request, RunRealtimeReportResponse)
+
+
+class SyntheticClient:
+    """Generates deterministic reports of any size: every dimension combination gets a row.
+
+    Values depend only on the request and `seed`, so repeated runs (and the
+    pages of one report) are consistent. String EXACT / IN_LIST filters on a
+    dimension are honoured; other filters are ignored.
+    """
+
+    cache_namespace = "synthetic"
+
+    def __init__(self, pages=SYNTHETIC_PAGES, seed=0, latency=0.0):
+        self.pages = pages
+        self.seed = seed
+        self.latency = latency
+        self.tokens_remaining = TOKENS_PER_HOUR
+
+    def _domain(self, name, days):
+        if name == "date":
+            return [d.strftime("%Y%m%d") for d in days]
+        if name == "dateHour":
+            return [f"{d:%Y%m%d}{h:02d}" for d in days for h in range(24)]
+        if name == "dateHourMinute":
+            return [f"{d:%Y%m%d}{h:02d}{m:02d}" for d in days for h in range(24) for m in range(60)]
+        if name == "yearMonth":
+            return sorted({d.strftime("%Y%m") for d in days})
+        if name == "year":
+            return sorted({d.strftime("%Y") for d in days})
+        if name == "pagePath":
+            return [f"/category/{CATEGORIES[i % len(CATEGORIES)]}/haber-{i}/" for i in range(self.pages)]
+        if name == "pageTitle":
+            return [f"Haber {i}" for i in range(self.pages)]
+        return DIMENSION_VALUES.get(name, [f"{name}_{i}" for i in range(20)])
+
+    def _restrict(self, domains, expression):
+        """Narrow dimension domains by the EXACT / IN_LIST string filters of a filter expression."""
+        if expression is None or not type(expression).pb(expression).ByteSize():
+            return
+        for child in expression.and_group.expressions:
+            self._restrict(domains, child)
+        f = expression.filter
+        if f.field_name not in domains:
+            return
+        if "string_filter" in f and f.string_filter.match_type == Filter.StringFilter.MatchType.EXACT:
+            allowed = {f.string_filter.value}
+        elif "in_list_filter" in f:
+            allowed = set(f.in_list_filter.values)
+        else:
+            return
+        domains[f.field_name] = [v for v in domains[f.field_name] if v in allowed]
+
+    def _metric_type(self, name):
+        if name in FLOAT_METRICS:
+            return MetricType.TYPE_FLOAT
+        if name in SECONDS_METRICS:
+            return MetricType.TYPE_SECONDS
+        return MetricType.TYPE_INTEGER
+
+    def _positions(self, index, axes, sizes):
+        """Row index -> position on each dimension axis (mixed radix, last axis fastest)."""
+        positions, rest = {}, index.copy()
+        for d, size in zip(reversed(axes), reversed(sizes)):
+            positions[d] = rest % size
+            rest //= size
+        return positions
+
+    def _metric_values(self, index, positions, salt, j, mtype):
+        """Deterministic values of the j-th metric for the given rows."""
+        noise = (index * 2654435761 + salt + j * 40503) % 1000
+        if mtype == MetricType.TYPE_FLOAT:
+            return noise / 1000
+        if mtype == MetricType.TYPE_SECONDS:
+            return noise * 0.37
+        # Long-tailed counts: earlier pages are more popular
+        rank = positions.get("pagePath", np.zeros_like(index))
+        return noise // (1 + rank // 50) + 1
+
+    def _respond(self, request, response_type, days):
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        dims = [d.name for d in request.dimensions]
+        metrics = [m.name for m in request.metrics]
+        domains = {d: self._domain(d, days) for d in dims}
+        # pageTitle follows pagePath instead of multiplying the row count
+        linked = "pageTitle" in domains and "pagePath" in domains
+        if linked:
+            del domains["pageTitle"]
+        self._restrict(domains, request.dimension_filter if "dimension_filter" in request else None)
+
+        axes = [d for d in dims if d in domains]
+        sizes = [len(domains[d]) for d in axes]
+        total = int(np.prod(sizes)) if axes else 1
+        offset = getattr(request, "offset", 0)
+        limit = getattr(request, "limit", 0) or 10000
+        salt = int(hashlib.md5(f"{self.seed}|{','.join(dims)}".encode()).hexdigest()[:8], 16)
+        order_bys = list(getattr(request, "order_bys", None) or [])
+        if order_bys and order_bys[0].metric.metric_name in metrics:
+            # Rank every row by the ordering metric, then page through that ranking
+            everything = np.arange(total, dtype=np.int64)
+            j = metrics.index(order_bys[0].metric.metric_name)
+            key = self._metric_values(everything, self._positions(everything, axes, sizes), salt, j,
+                                      self._metric_type(metrics[j]))
+            ranking = np.argsort(-key if order_bys[0].desc else key, kind="stable")
+            index = ranking[offset:offset + limit]
+        else:
+            index = np.arange(offset, min(total, offset + limit), dtype=np.int64)
+        positions = self._positions(index, axes, sizes)
+
+        pb = response_type.pb()()
+        for d in dims:
+            pb.dimension_headers.add(name=d)
+        values = {}
+        for j, m in enumerate(metrics):
+            mtype = self._metric_type(m)
+            pb.metric_headers.add(name=m, type_=mtype)
+            raw = self._metric_values(index, positions, salt, j, mtype)
+            if mtype == MetricType.TYPE_FLOAT:
+                values[m] = [f"{v:.4f}" for v in raw]
+            elif mtype == MetricType.TYPE_SECONDS:
+                values[m] = [f"{v:.2f}" for v in raw]
+            else:
+                values[m] = [str(v) for v in raw]
+
+        for k in range(len(index)):
+            row = pb.rows.add()
+            for d in dims:
+                if d == "pageTitle" and linked:
+                    value = f"Haber {positions['pagePath'][k]}"
+                else:
+                    value = domains[d][positions[d][k]] if d in positions else domains[d][0]
+                row.dimension_values.add(value=value)
+            for m in metrics:
+                row.metric_values.add(value=values[m][k])
+        pb.row_count = total
+
+        if request.return_property_quota:
+            cost = 1 + len(index) // 10000
+            self.tokens_remaining = max(0, self.tokens_remaining - cost)
+            pb.property_quota.tokens_per_hour.consumed = cost
+            pb.property_quota.tokens_per_hour.remaining = self.tokens_remaining
+        return response_type.wrap(pb)
+
+    def _days(self, date_range):
+        from analytics_helper import resolve_date
+        start, end = resolve_date(date_range.start_date), resolve_date(date_range.end_date)
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    def run_report(self, request):
+        if len(request.date_ranges) > 1:
+            return self._multi_range(request)
+        return self._respond(request, RunReportResponse, self._days(request.date_ranges[0]))
+
+    def _multi_range(self, request):
+        """One report per date range, stacked with a dateRange column, then paged like any other."""
+        dims = [d.name for d in request.dimensions]
+        sub_dims = [d for d in dims if d != "dateRange"]
+        pb = RunReportResponse.pb()()
+        rows = []
+        for i, date_range in enumerate(request.date_ranges):
+            sub = RunReportRequest(dimensions=[{"name": d} for d in sub_dims], metrics=request.metrics,
+                                   date_ranges=[date_range], dimension_filter=request.dimension_filter,
+                                   limit=PAGE_ROWS_MAX, return_property_quota=request.return_property_quota)
+            part = RunReportResponse.pb(self.run_report(sub))
+            if i == 0:
+                pb.metric_headers.extend(part.metric_headers)
+            pb.property_quota.CopyFrom(part.property_quota)
+            label = date_range.name or f"date_range_{i}"
+            for row in part.rows:
+                values = [v.value for v in row.dimension_values]
+                if "dateRange" in dims:
+                    values.insert(dims.index("dateRange"), label)
+                rows.append((values, [v.value for v in row.metric_values]))
+        for d in dims:
+            pb.dimension_headers.add(name=d)
+        offset, limit = request.offset, request.limit or 10000
+        for values, metric_values in rows[offset:offset + limit]:
+            row = pb.rows.add()
+            for v in values:
+                row.dimension_values.add(value=v)
+            for v in metric_values:
+                row.metric_values.add(value=v)
+        pb.row_count = len(rows)
+        return RunReportResponse.wrap(pb)
+
+    def batch_run_reports(self, request):
+        return BatchRunReportsResponse(reports=[self.run_report(r) for r in request.requests])
+
+    def run_realtime_report(self, request):
+        return self._respond(request, RunRealtimeReportResponse, [])
+
+
+class AsyncClientAdapter:
+    """Awaitable facade over a synchronous (stand-in) client, for AsyncAnalyticsHelper."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def run_report(self, request):
+        return await asyncio.to_thread(self.client.run_report, request)
+
+    async def batch_run_reports(self, request):
+        return await asyncio.to_thread(self.client.batch_run_reports, request)
+
+    async def run_realtime_report(self, request):
+        return await asyncio.to_thread(self.client.run_realtime_report, request)
+
+
+def client_from_env():
+    """Stand-in client selected by GA4_CLIENT, or None to use live GA4."""
+    setting = os.environ.get("GA4_CLIENT", "")
+    if not setting or setting == "live":
+        return None
+    mode, _, arg = setting.partition(":")
+    latency = float(os.environ.get("GA4_LATENCY", "0") or 0)
+    if mode == "record":
+        from google.analytics.data_v1beta import BetaAnalyticsDataClient
+        return RecordingClient(BetaAnalyticsDataClient(), arg or "ga4_recordings")
+    if mode == "replay":
+        return ReplayClient(arg or "ga4_recordings", latency=latency)
+    if mode == "synthetic":
+        return SyntheticClient(pages=int(arg or SYNTHETIC_PAGES), latency=latency)
+    raise ValueError(f"Bilinmeyen GA4_CLIENT: {setting} (record:DIR, replay:DIR veya synthetic[:SAYFA])")
+
+
+if __name__ == "__main__":
+    from analytics_helper import AnalyticsHelper
+
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else SYNTHETIC_PAGES
+    helper = AnalyticsHelper(client=SyntheticClient(pages=pages))
+    helper.clear_cache()  # measure fetch + decode, not cache hits
+    print(f"=== Sentetik GA4: {pages} sayfa ===")
+    for name, fn in [
+        ("Günlük trafik (1 yıl)", lambda: helper.get_daily_traffic("365daysAgo", "today")),
+        ("Dakikalık trafik (bugün)", lambda: helper.get_minutely_traffic()),
+        ("En çok okunanlar", lambda: helper.get_top_pages("365daysAgo", "today", limit=500)),
+        ("Sayfa x gün", lambda: helper.run_report(["date", "pagePath"], ["screenPageViews", "activeUsers"],
+                                                 DateRange(start_date="90daysAgo", end_date="today"), cache=False)),
+    ]:
+        t0 = time.perf_counter()
+        df = fn()
+        print(f"  {name}: {len(df)} satır, {time.perf_counter() - t0:.3f}s")
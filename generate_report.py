@@ -8,23 +8,54 @@ sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from analytics_helper import AnalyticsHelper
-from datetime import datetime, timedelta
+from analytics_helper import AnalyticsHelper, AsyncAnalyticsHelper, PAGE_BREAKDOWNS, resolve_date
+from fact_store import FactStore, FACTS
+from query_planner import QueryPlanner
+from datetime import date, datetime, timedelta
 import os
 import calendar
+import time
 import glob
 from bs4 import BeautifulSoup
 
+LIVE_INTERVAL = 5 * 60  # seconds between bugun.html rebuilds in --live mode
+# Defaults of the legacy single-property build (Katman Portal, no prop); named properties set
+# "crawled_dir" / "tracking_start" in properties.json or go without
+DEFAULT_CRAWLED_DIR = "Crawled_Data"
+DEFAULT_TRACKING_START = "2026-02-15"  # first day with GA4 data; no comparisons before it
+# Detail chart labels per TIME_GRAINS bucket: (bucket, rolling total, points per rolling total, x axis format)
+SERIES_LABELS = {
+    "10min": ("10dk", "Saatlik", 6, "%d.%m %H:%M"),
+    "60min": ("Saatlik", "Günlük", 24, "%d.%m %H:%M"),
+    "1D": ("Günlük", "Haftalık", 7, "%d.%m.%Y"),
+}
+
 class ReportGenerator:
-    def __init__(self):
-        self.helper = AnalyticsHelper()
-        self.output_dir = "dashboard"
+    def __init__(self, max_concurrency=0, use_facts=True, prop=None, client=None, excel=False):
+        # prop: GA4 property config (see build_properties.py); a named property is built into
+        # dashboard/<name>/ (or its "output_dir") from its own cache. client may be shared.
+        prop = prop or {}
+        self.helper = AnalyticsHelper(client=client, prop=prop)
+        self.helper.export_excel = excel  # exported_data/ gets .xlsx copies only when asked for
+        # With max_concurrency > 0 prefetching runs concurrently on the async client
+        self.async_helper = AsyncAnalyticsHelper(max_concurrency, client=client, prop=prop) if max_concurrency else None
+        # Date pages derive countries, cities, sources and top pages from day-level facts
+        self.facts = FactStore(self.helper) if use_facts else None
+        self.output_dir = prop.get("output_dir") or os.path.join("dashboard", prop.get("name") or "")
+        legacy = not prop.get("name")
+        # Without crawl data there is no authors page
+        self.crawled_dir = prop.get("crawled_dir") or (DEFAULT_CRAWLED_DIR if legacy else None)
+        tracking_start = prop.get("tracking_start") or (DEFAULT_TRACKING_START if legacy else None)
+        self.tracking_start = date.fromisoformat(tracking_start) if tracking_start else None
+        # Date pages start at the tracking start (else this year) and are named after the property
+        self.first_day = self.tracking_start or date.today().replace(month=1, day=1)
+        self.page_prefix = f"{prop.get('name') or 'katman'}_dashboard"
         os.makedirs(self.output_dir, exist_ok=True)
 
         # Load crawled index for author lookup
         self.index_df = None
         index_path = os.path.join(os.path.dirname(__file__), "katman_crawled_index.xlsx")
-        if os.path.exists(index_path):
+        if legacy and os.path.exists(index_path):
             self.index_df = pd.read_excel(index_path)
 
         # Katman Portal category groups
@@ -119,15 +150,15 @@ class ReportGenerator:
                     <a href="son30gun.html" class="list-group-item list-group-item-action fw-bold text-primary">
                         <i class="fas fa-chart-line me-2"></i> Son 30 Gün
                     </a>
-                    <a href="yazarlar_stats.html" class="list-group-item list-group-item-action fw-bold text-success">
+                    """ + ("""<a href="yazarlar_stats.html" class="list-group-item list-group-item-action fw-bold text-success">
                         <i class="fas fa-users me-2"></i> Yazar İstatistikleri
-                    </a>
+                    </a>""" if self.crawled_dir else "") + """
                 </div>
                 <h6 class="text-uppercase text-muted fw-bold px-3 mt-3 small">Yıllık Arşivler</h6>
                 <div class="accordion accordion-flush" id="accordionSidebar">
         """
 
-        for year in range(current_year, 2025, -1):
+        for year in range(current_year, self.first_day.year - 1, -1):
             collapse_id = f"collapseYear{year}"
             html += f"""
                 <div class="accordion-item">
@@ -139,7 +170,7 @@ class ReportGenerator:
                     <div id="{collapse_id}" class="accordion-collapse collapse" data-bs-parent="#accordionSidebar">
                         <div class="accordion-body p-0">
                             <div class="list-group list-group-flush">
-                                <a href="katman_dashboard_{year}.html" class="list-group-item list-group-item-action bg-light fw-bold ps-4">
+                                <a href="{self.page_prefix}_{year}.html" class="list-group-item list-group-item-action bg-light fw-bold ps-4">
                                     <i class="fas fa-globe me-2"></i> {year} Özeti
                                 </a>
             """
@@ -147,20 +178,20 @@ class ReportGenerator:
             if year > current_year:
                 end_month = 0
 
-            for month in range(1, end_month + 1):
+            for month in range(self._first_month_of(year), end_month + 1):
                 month_name = self.months_map[month]
                 html += f"""
-                                <a href="katman_dashboard_{year}_{month:02d}.html" class="list-group-item list-group-item-action small ps-5 fw-bold">
+                                <a href="{self.page_prefix}_{year}_{month:02d}.html" class="list-group-item list-group-item-action small ps-5 fw-bold">
                                     {month_name}
                                 </a>
                 """
                 # Daily links under current month
                 if year == current_year and month == current_month:
                     today_day = datetime.now().day
-                    start_day = 15 if month == 2 and year == 2026 else 1
+                    start_day = self._first_day_of(year, month)
                     for d in range(start_day, today_day + 1):
                         html += f"""
-                                <a href="katman_dashboard_{year}_{month:02d}_{d:02d}.html" class="list-group-item list-group-item-action small ps-5 text-muted" style="font-size:0.85em; padding-left:3.5rem !important;">
+                                <a href="{self.page_prefix}_{year}_{month:02d}_{d:02d}.html" class="list-group-item list-group-item-action small ps-5 text-muted" style="font-size:0.85em; padding-left:3.5rem !important;">
                                     &bull; {d} {month_name}
                                 </a>
                         """
@@ -177,13 +208,21 @@ class ReportGenerator:
         return html
 
     # ─── SCORECARD ──────────────────────────────────────────
-    def _scorecard_html(self, users, sessions, views, events):
+    def _scorecard_html(self, users, sessions, views, events, previous=None):
+        """Four total cards; previous = (users, sessions, views, events) of the prior period adds a change line."""
+        def delta(current, i):
+            if not previous or not previous[i]:
+                return ""
+            change = (current - previous[i]) / previous[i] * 100
+            color, arrow = ("text-success", "▲") if change >= 0 else ("text-danger", "▼")
+            return f'<div class="small {color}">{arrow} %{abs(change):.0f} önceki döneme göre</div>'
+
         return f"""
         <div class="row mb-4 g-2">
-            <div class="col-6 col-md-3"><div class="metric-box"><div class="metric-value text-primary">{users:,}</div><div class="metric-label">Toplam Kullanıcı</div></div></div>
-            <div class="col-6 col-md-3"><div class="metric-box"><div class="metric-value text-success">{sessions:,}</div><div class="metric-label">Toplam Oturum</div></div></div>
-            <div class="col-6 col-md-3"><div class="metric-box"><div class="metric-value text-info">{views:,}</div><div class="metric-label">Sayfa Görüntüleme</div></div></div>
-            <div class="col-6 col-md-3"><div class="metric-box"><div class="metric-value text-warning">{events:,}</div><div class="metric-label">Toplam Etkileşim</div></div></div>
+            <div class="col-6 col-md-3"><div class="metric-box"><div class="metric-value text-primary">{users:,}</div><div class="metric-label">Toplam Kullanıcı</div>{delta(users, 0)}</div></div>
+            <div class="col-6 col-md-3"><div class="metric-box"><div class="metric-value text-success">{sessions:,}</div><div class="metric-label">Toplam Oturum</div>{delta(sessions, 1)}</div></div>
+            <div class="col-6 col-md-3"><div class="metric-box"><div class="metric-value text-info">{views:,}</div><div class="metric-label">Sayfa Görüntüleme</div>{delta(views, 2)}</div></div>
+            <div class="col-6 col-md-3"><div class="metric-box"><div class="metric-value text-warning">{events:,}</div><div class="metric-label">Toplam Etkileşim</div>{delta(events, 3)}</div></div>
         </div>
         """
 
@@ -239,8 +278,10 @@ class ReportGenerator:
     # ─── AUTHOR & ARTICLE EXTRACTION ──────────────────────
     def _extract_authors_articles(self):
         """Extract author names and their articles from crawled HTML."""
-        crawled_dir = "Crawled_Data"
+        crawled_dir = self.crawled_dir
         authors = {}  # slug -> {name, articles: [{title, url, slug}]}
+        if not crawled_dir or not os.path.isdir(crawled_dir):
+            return authors
 
         # 1. Parse author pages for names and article links
         for f in glob.glob(os.path.join(crawled_dir, "author_*.html")):
@@ -306,15 +347,10 @@ class ReportGenerator:
 
         return authors
 
-    def generate_authors_page(self, sidebar_html):
-        """Generate author statistics page with per-article read counts."""
-        print(">>> Yazar İstatistikleri sayfası")
-        authors = self._extract_authors_articles()
-        print(f"   {len(authors)} yazar, toplam {sum(len(a['articles']) for a in authors.values())} yazı bulundu")
-
+    def _author_stats(self, authors):
+        """(all-time top pages, per-author view stats sorted by views) for the authors page."""
         # Get all page views from GA4
         df_pages = self.helper.get_top_pages(start_date="2020-01-01", end_date="today", limit=500)
-        self.helper.save_data(df_pages, "all_pages_views")
 
         # Build path -> views mapping
         page_views = {}
@@ -347,6 +383,21 @@ class ReportGenerator:
                 "articles": articles_with_views
             })
         author_stats.sort(key=lambda x: x["total_views"], reverse=True)
+        return df_pages, author_stats
+
+    def generate_authors_page(self, sidebar_html):
+        """Generate author statistics page with per-article read counts."""
+        print(">>> Yazar İstatistikleri sayfası")
+        if not self.crawled_dir:
+            print("   crawled_dir tanımlı değil, atlandı")
+            return
+        authors = self._extract_authors_articles()
+        print(f"   {len(authors)} yazar, toplam {sum(len(a['articles']) for a in authors.values())} yazı bulundu")
+        if not authors:
+            return
+
+        df_pages, author_stats = self._author_stats(authors)
+        self.helper.save_data(df_pages, "all_pages_views", "2020-01-01", "today", page="yazarlar_stats")
 
         # ── Charts ──
         plotly_static = {'responsive': True, 'scrollZoom': False, 'doubleClick': False, 'displayModeBar': False}
@@ -489,6 +540,8 @@ class ReportGenerator:
             fh.write(html)
         print(f"   [SAVED] {filepath}")
 
+        bulk, _ = self._prefetch_details(author_stats)
+
         # ── Generate individual article detail pages ──
         for a in author_stats:
             for art in a["articles"]:
@@ -499,7 +552,8 @@ class ReportGenerator:
                     paths=art["path"],
                     filename=art_filename,
                     sidebar_html=sidebar_html,
-                    subtitle=f"Yazar: {a['name']}"
+                    subtitle=f"Yazar: {a['name']}",
+                    bulk=bulk
                 )
 
         # ── Generate individual author detail pages ──
@@ -514,63 +568,100 @@ class ReportGenerator:
                 paths=author_paths,
                 filename=author_filename,
                 sidebar_html=sidebar_html,
-                subtitle=f"{a['article_count']} yazı"
+                subtitle=f"{a['article_count']} yazı",
+                bulk=bulk
             )
 
         # ── Update article links in author page to point to detail pages ──
         # (links already set in the table above)
 
-    def _generate_detail_page(self, title, paths, filename, sidebar_html, subtitle=""):
-        """Generate a detail page for an article or author with traffic, sources, geography."""
+    def _prefetch_details(self, author_stats):
+        """Fetch the detail pages' data for every article and author; returns (bulk frames or None, queries sent).
+
+        One pagePath-keyed query per breakdown covers all articles, then the
+        finer-than-daily series of short-lived pages, sized from their daily rows.
+        """
+        all_paths = sorted({art["path"] for a in author_stats for art in a["articles"]})
+        if not all_paths:
+            return None, 0
+        n = self._prefetch(lambda: [self.helper.get_pages_bulk(all_paths, kind) for kind in PAGE_BREAKDOWNS])
+        bulk = {kind: self.helper.get_pages_bulk(all_paths, kind) for kind in PAGE_BREAKDOWNS}
+        detail_paths = [art["path"] for a in author_stats for art in a["articles"]] + \
+                       [[art["path"] for art in a["articles"]] for a in author_stats if a["articles"]]
+        n += self._prefetch(lambda: [self._detail_series(p, self.helper.slice_pages_bulk(bulk["daily"], "daily", p))
+                                     for p in detail_paths])
+        return bulk, n
+
+    def _detail_series(self, paths, df_daily):
+        """(series, grain) for a detail chart: the page's active days at the finest grain time_grain allows.
+
+        Long-lived pages are drawn straight from their daily rows; only short
+        spans are queried again by hour or minute.
+        """
+        if df_daily.empty:
+            return pd.DataFrame(), None
+        active = df_daily.loc[df_daily['screenPageViews'].astype(int) > 0, 'date']
+        if active.empty:
+            return pd.DataFrame(), None
+        first, last = active.min(), active.max()
+        start, end = (datetime.strptime(d, "%Y%m%d").strftime("%Y-%m-%d") for d in (first, last))
+        grain = self.helper.time_grain(start, end)
+        if grain["dimension"] == "date":
+            df_daily = df_daily[(df_daily['date'] >= first) & (df_daily['date'] <= last)]
+            return self.helper.resample_timeseries(df_daily, grain), grain
+        return self.helper.get_page_timeseries(paths, start, end), grain
+
+    def _generate_detail_page(self, title, paths, filename, sidebar_html, subtitle="", bulk=None):
+        """Generate a detail page for an article or author with traffic, sources, geography.
+
+        bulk holds get_pages_bulk frames per breakdown; the page's rows are sliced
+        from them (and summed over an author's articles) instead of queried.
+        """
         filepath = os.path.join(self.output_dir, filename)
         plotly_static = {'responsive': True, 'scrollZoom': False, 'doubleClick': False, 'displayModeBar': False}
 
-        from google.analytics.data_v1beta.types import FilterExpression, Filter, DateRange
-
-        # Build path filter
-        pf = self.helper._make_path_filter(paths)
+        if bulk is not None:
+            data = {kind: self.helper.slice_pages_bulk(df, kind, paths) for kind, df in bulk.items()}
+        else:
+            data = {
+                "totals": self.helper.get_page_totals(paths),
+                "daily": self.helper.get_page_daily(paths),
+                "sources": self.helper.get_page_sources(paths),
+                "countries": self.helper.get_page_countries(paths),
+                "cities": self.helper.get_page_cities(paths),
+            }
 
         # ── Aggregate totals (all-time) ──
-        df_totals = self.helper.run_report(
-            dimensions=[],
-            metrics=["screenPageViews", "activeUsers", "sessions"],
-            date_range=DateRange(start_date="2020-01-01", end_date="today"),
-            dimension_filter=pf
-        )
+        df_totals = data["totals"]
         total_views = int(df_totals['screenPageViews'].iloc[0]) if not df_totals.empty else 0
         total_users = int(df_totals['activeUsers'].iloc[0]) if not df_totals.empty else 0
         total_sessions = int(df_totals['sessions'].iloc[0]) if not df_totals.empty else 0
 
-        # ── Minutely traffic chart (10-min resample, like bugun.html) ──
-        df_minutely = self.helper.get_page_minutely(paths)
+        # ── Traffic chart (10-min, hourly or daily buckets depending on the page's active span) ──
+        df_minutely, grain = self._detail_series(paths, data["daily"])
         minutely_html = ""
         if not df_minutely.empty:
-            df_minutely['time'] = pd.to_datetime(df_minutely['dateHourMinute'], format='%Y%m%d%H%M')
-            df_minutely = df_minutely.sort_values('time')
-            for col in ['activeUsers', 'sessions', 'screenPageViews', 'eventCount']:
-                df_minutely[col] = df_minutely[col].astype(int)
-            df_minutely = df_minutely.set_index('time').resample('10min').sum(numeric_only=True).reset_index()
-            df_minutely['activeUsers_hourly'] = df_minutely['activeUsers'].rolling(window=6, min_periods=1).sum()
-            df_minutely['sessions_hourly'] = df_minutely['sessions'].rolling(window=6, min_periods=1).sum()
+            label, window_label, window, tickformat = SERIES_LABELS[grain["bucket"]]
+            df_minutely['activeUsers_hourly'] = df_minutely['activeUsers'].rolling(window=window, min_periods=1).sum()
+            df_minutely['sessions_hourly'] = df_minutely['sessions'].rolling(window=window, min_periods=1).sum()
 
             fig_min = go.Figure()
             fig_min.add_trace(go.Scatter(x=df_minutely['time'], y=df_minutely['activeUsers'],
-                                         name='Kullanıcı (10dk)', line=dict(color='#00CC96')))
+                                         name=f'Kullanıcı ({label})', line=dict(color='#00CC96')))
             fig_min.add_trace(go.Scatter(x=df_minutely['time'], y=df_minutely['sessions'],
-                                         name='Oturum (10dk)', line=dict(color='#636EFA')))
+                                         name=f'Oturum ({label})', line=dict(color='#636EFA')))
             fig_min.add_trace(go.Scatter(x=df_minutely['time'], y=df_minutely['activeUsers_hourly'],
-                                         name='Kullanıcı (Saatlik Toplam)', line=dict(color='#00CC96', dash='dot')))
+                                         name=f'Kullanıcı ({window_label} Toplam)', line=dict(color='#00CC96', dash='dot')))
             fig_min.add_trace(go.Scatter(x=df_minutely['time'], y=df_minutely['sessions_hourly'],
-                                         name='Oturum (Saatlik Toplam)', line=dict(color='#636EFA', dash='dot')))
-            fig_min.update_layout(title=f"Trafik ({title[:40]}) — 10 Dakikalık",
-                                  xaxis_title="Saat", yaxis_title="Sayı",
-                                  hovermode="x unified", xaxis=dict(tickformat='%H:%M'))
+                                         name=f'Oturum ({window_label} Toplam)', line=dict(color='#636EFA', dash='dot')))
+            fig_min.update_layout(title=f"Trafik ({title[:40]}) — {label}",
+                                  xaxis_title="Zaman", yaxis_title="Sayı",
+                                  hovermode="x unified", xaxis=dict(tickformat=tickformat))
             minutely_html = fig_min.to_html(full_html=False, include_plotlyjs='cdn', config=plotly_static)
 
-        # Fetch remaining data
-        df_sources = self.helper.get_page_sources(paths)
-        df_countries = self.helper.get_page_countries(paths)
-        df_cities = self.helper.get_page_cities(paths)
+        df_sources = data["sources"]
+        df_countries = data["countries"]
+        df_cities = data["cities"]
 
 
         # ── Sources pie chart ──
@@ -641,7 +732,7 @@ class ReportGenerator:
                 <div class="col-4"><div class="card p-3"><h4 class="text-info fw-bold">{total_sessions:,}</h4><small class="text-muted">Oturum</small></div></div>
             </div>
 
-            {"<div class='card mb-4'><div class='card-body'>" + minutely_html + "</div></div>" if minutely_html else "<div class='alert alert-info'>Dakikalık veri bulunamadı.</div>"}
+            {"<div class='card mb-4'><div class='card-body'>" + minutely_html + "</div></div>" if minutely_html else "<div class='alert alert-info'>Trafik verisi bulunamadı.</div>"}
 
             <div class="row">
                 <div class="col-md-6">
@@ -675,61 +766,170 @@ class ReportGenerator:
         # 0.5. Author Statistics Page
         self.generate_authors_page(sidebar)
 
+        # 1. Bugün, 2. Son 30 Gün, 3. Yearly & Monthly pages
+        date_pages = self._date_pages()
+        self._update_facts(date_pages)
+
+        # Queue every date page's queries up front and fetch them together
+        n = self._prefetch(lambda: [self._fetch_page_data(p["start"], p["end"]) for p in date_pages])
+        print(f">>> {len(date_pages)} tarih sayfası için {n} sorgu önceden çekildi")
+
+        for p in date_pages:
+            print(p["label"])
+            self.generate_page(p["start"], p["end"], p["title"], p["filename"], sidebar, is_monthly=p["is_monthly"])
+
+        print(f">>> Önbellek: {self.helper.cache_summary()}")
+        print(f">>> Dışa aktarım: {self.helper.flush_exports()}")
+
+    def warm_up(self):
+        """Fetch every query generate_all_reports makes into the cache, without rendering anything.
+
+        Goes through the build's stages in order (facts, date pages, authors
+        page, detail pages), since each stage's queries depend on the data of
+        the one before; within a stage the missing queries are fetched
+        together. Returns the number of queries fetched.
+        """
+        start = time.time()
+        date_pages = self._date_pages()
+        self._update_facts(date_pages)
+        n = self._prefetch(lambda: [self._fetch_page_data(p["start"], p["end"]) for p in date_pages])
+        if self.crawled_dir:
+            _, author_stats = self._author_stats(self._extract_authors_articles())
+            n += self._prefetch_details(author_stats)[1]
+        print(f">>> Önbellek ısıtıldı: {n} sorgu, {time.time() - start:.1f} sn ({self.helper.cache_summary()})")
+        return n
+
+    def _update_facts(self, date_pages):
+        """Bring the day-level facts up to date (only days not stored yet, plus today/yesterday)."""
+        if self.facts is None:
+            return
+        earliest = min(datetime.strptime(p["start"], "%Y-%m-%d") for p in date_pages) - timedelta(days=30)
+        # ...and the periods the pages are compared with
+        previous = [self._previous_period(p["start"], p["end"]) for p in date_pages]
+        earliest = min([earliest] + [datetime.strptime(r[0], "%Y-%m-%d") for r in previous if r])
+        self.facts.update(list(FACTS), earliest.strftime("%Y-%m-%d"), "today")
+
+    def run_live(self, interval=None):
+        """Rebuild bugun.html from the realtime feed every `interval` seconds until interrupted."""
+        interval = interval or LIVE_INTERVAL
+        sidebar = self._create_sidebar_html()
+        print(f">>> Canlı mod: bugun.html her {interval // 60} dakikada yenileniyor (Ctrl+C ile çıkış)")
+        try:
+            while True:
+                page = self._date_pages()[0]  # Bugün; recomputed so the loop follows midnight
+                self.generate_page(page["start"], page["end"], page["title"], page["filename"], sidebar,
+                                   is_monthly=page["is_monthly"], live=True)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print(">>> Canlı mod durduruldu")
+
+    def _prefetch(self, collect_fn):
+        """Fetch every uncached query collect_fn makes: concurrently if async, else via batchRunReports.
+
+        The query planner dedupes the queries and derives what it can from
+        wider ones before anything is sent.
+        """
+        specs = self.helper.collect(collect_fn)
+        if specs:
+            QueryPlanner(self.async_helper or self.helper).run(specs)
+        return len(specs)
+
+    def _date_pages(self):
+        """List the date-based pages of a build: today, last 30 days, years, months and current-month days."""
+        pages = []
+
         # 1. Bugün (Today - Live Traffic)
         today_str = datetime.now().strftime('%Y-%m-%d')
-        print(f">>> Bugün ({today_str}) - Canlı Trafik")
-        self.generate_page(today_str, "today", "Bugün (Canlı)", "bugun.html", sidebar, is_monthly=True)
+        pages.append({"start": today_str, "end": "today", "title": "Bugün (Canlı)", "filename": "bugun.html",
+                      "is_monthly": True, "label": f">>> Bugün ({today_str}) - Canlı Trafik"})
 
         # 2. Son 30 Gün
-
-        print(">>> Son 30 Gün (son30gun.html)")
         start_30 = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-        self.generate_page(start_30, "today", "Son 30 Gün", "son30gun.html", sidebar, is_monthly=True)
+        pages.append({"start": start_30, "end": "today", "title": "Son 30 Gün", "filename": "son30gun.html",
+                      "is_monthly": True, "label": ">>> Son 30 Gün (son30gun.html)"})
 
-        # 3. Yearly & Monthly - start from 2026 (GA4 tracking installed in 2026)
+        # 3. Yearly & Monthly - from the year tracking started
         current_year = datetime.now().year
         current_month = datetime.now().month
-        start_year = 2026  # GA4 tracking start year
 
-        for year in range(start_year, current_year + 1):
+        for year in range(self.first_day.year, current_year + 1):
             year_start = f"{year}-01-01"
             year_end = f"{year}-12-31"
-
-            print(f">>> {year} Yılı")
-            self.generate_page(year_start, year_end, f"{year} Yılı", f"katman_dashboard_{year}.html", sidebar)
+            pages.append({"start": year_start, "end": year_end, "title": f"{year} Yılı",
+                          "filename": f"{self.page_prefix}_{year}.html", "is_monthly": False,
+                          "label": f">>> {year} Yılı"})
 
             end_m = current_month if year == current_year else 12
-            for m in range(1, end_m + 1):
+            for m in range(self._first_month_of(year), end_m + 1):
                 _, last_day = calendar.monthrange(year, m)
                 m_start = f"{year}-{m:02d}-01"
                 m_end = f"{year}-{m:02d}-{last_day}"
                 month_name = self.months_map[m]
-                print(f"    - {month_name} {year}")
-                self.generate_page(m_start, m_end, f"{month_name} {year}",
-                                   f"katman_dashboard_{year}_{m:02d}.html", sidebar, is_monthly=True)
+                pages.append({"start": m_start, "end": m_end, "title": f"{month_name} {year}",
+                              "filename": f"{self.page_prefix}_{year}_{m:02d}.html", "is_monthly": True,
+                              "label": f"    - {month_name} {year}"})
 
                 # Daily pages for current month
                 if year == current_year and m == current_month:
                     today_day = datetime.now().day
-                    start_day = 15 if m == 2 and year == 2026 else 1
+                    start_day = self._first_day_of(year, m)
                     for d in range(start_day, today_day + 1):
                         d_date = f"{year}-{m:02d}-{d:02d}"
-                        print(f"      * {d} {month_name} {year}")
-                        self.generate_page(d_date, d_date, f"{d} {month_name} {year}",
-                                           f"katman_dashboard_{year}_{m:02d}_{d:02d}.html", sidebar, is_monthly=True)
+                        pages.append({"start": d_date, "end": d_date, "title": f"{d} {month_name} {year}",
+                                      "filename": f"{self.page_prefix}_{year}_{m:02d}_{d:02d}.html",
+                                      "is_monthly": True, "label": f"      * {d} {month_name} {year}"})
+        return pages
 
-    def generate_page(self, start_date, end_date, title, filename, sidebar_html, is_monthly=False):
-        filepath = os.path.join(self.output_dir, filename)
-        print(f"   [Processing: {filepath}]")
+    def _first_month_of(self, year):
+        """First month of a year that gets a monthly page (the tracking start month in its own year)."""
+        return self.first_day.month if year == self.first_day.year else 1
 
-        # ── Fetch & Save Data ───────────────────────────────
+    def _first_day_of(self, year, month):
+        """First day of a month that gets a daily page (the tracking start day in its own month)."""
+        return self.first_day.day if (year, month) == (self.first_day.year, self.first_day.month) else 1
+
+    def _previous_period(self, start_date, end_date):
+        """(start, end) of the period a date page is compared with, or None.
+
+        Calendar months and years compare with the previous month / year over
+        the same number of days (so a running month isn't held against a full
+        one); other ranges with the same number of days right before them.
+        """
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        nominal_end = resolve_date(end_date)
+        end = min(nominal_end, date.today())
+        if end <= start:
+            return None
+        months = 0
+        if start.day == 1 and (nominal_end + timedelta(days=1)).day == 1:
+            months = 12 if start.month == 1 and nominal_end.month == 12 else 1 if nominal_end.month == start.month else 0
+        if months:
+            year, month = divmod(start.year * 12 + start.month - 1 - months, 12)
+            prev_start = date(year, month + 1, 1)
+        else:
+            prev_start = start - timedelta(days=(end - start).days + 1)
+        prev_end = min(prev_start + (end - start), start - timedelta(days=1))
+        if self.tracking_start and prev_start < self.tracking_start:
+            return None
+        return prev_start.isoformat(), prev_end.isoformat()
+
+    def _fetch_page_data(self, start_date, end_date, live=False):
+        """Fetch all GA4 data for a date page: (daily, countries, cities, sources, downloads, top_pages, previous).
+
+        previous holds the daily traffic of the comparison period (see
+        _previous_period); without facts it comes from the same request as the
+        page's own daily traffic, as a second date range.
+        live=True takes today's minute series from the realtime feed (get_live_minutely).
+        """
         # Detect if this is a single-day page
         is_single_day = (start_date == end_date) or end_date == "today"
+        df_previous = pd.DataFrame()
 
-        if is_single_day:
+        if live:
+            df_daily = self.helper.get_live_minutely()
+        elif is_single_day:
             # Minute-level data for single day
             df_daily = self.helper.get_minutely_traffic(start_date=start_date, end_date=end_date)
-            self.helper.save_data(df_daily, f"minutely_{title.replace(' ', '_')}")
         else:
             # Buffer for rolling averages
             fetch_start = start_date
@@ -738,23 +938,48 @@ class ReportGenerator:
                 fetch_start = (dt - timedelta(days=30)).strftime("%Y-%m-%d")
             except:
                 pass
-            df_daily = self.helper.get_daily_traffic(start_date=fetch_start, end_date=end_date)
-            self.helper.save_data(df_daily, f"daily_{title.replace(' ', '_')}")
-
-        df_countries = self.helper.get_countries(start_date=start_date, end_date=end_date)
-        self.helper.save_data(df_countries, f"countries_{title.replace(' ', '_')}")
-
-        df_cities = self.helper.get_tr_cities(start_date=start_date, end_date=end_date)
-        self.helper.save_data(df_cities, f"cities_{title.replace(' ', '_')}")
+            previous = self._previous_period(start_date, end_date)
+            if self.facts is not None:
+                df_daily = self.facts.frame("traffic", fetch_start, end_date)
+                if previous:
+                    df_previous = self.facts.frame("traffic", *previous)
+            elif previous:
+                df_daily, df_previous = self.helper.get_daily_traffic_ranges([(fetch_start, end_date), previous])
+            else:
+                df_daily = self.helper.get_daily_traffic(start_date=fetch_start, end_date=end_date)
+
+        if self.facts is not None:
+            df_countries = self.facts.rollup("country", start_date, end_date)
+            df_cities = self.facts.rollup("tr_city", start_date, end_date)
+            df_sources = self.facts.frame("channel", start_date, end_date)
+            df_top_pages = self.facts.rollup("page", start_date, end_date)
+            if not df_top_pages.empty:
+                df_top_pages = df_top_pages.sort_values(by="screenPageViews", ascending=False).head(20)
+        else:
+            df_countries = self.helper.get_countries(start_date=start_date, end_date=end_date)
+            df_cities = self.helper.get_tr_cities(start_date=start_date, end_date=end_date)
+            df_sources = self.helper.get_global_traffic_sources(start_date=start_date, end_date=end_date, over_time=True)
+            df_top_pages = self.helper.get_top_pages(start_date=start_date, end_date=end_date, limit=20)
+        df_downloads = self.helper.get_downloads(start_date=start_date, end_date=end_date, limit=100)
+        return df_daily, df_countries, df_cities, df_sources, df_downloads, df_top_pages, df_previous
 
-        df_sources = self.helper.get_global_traffic_sources(start_date=start_date, end_date=end_date, over_time=True)
-        self.helper.save_data(df_sources, f"sources_{title.replace(' ', '_')}")
+    def generate_page(self, start_date, end_date, title, filename, sidebar_html, is_monthly=False, live=False):
+        filepath = os.path.join(self.output_dir, filename)
+        print(f"   [Processing: {filepath}]")
 
-        df_downloads = self.helper.get_downloads(start_date=start_date, end_date=end_date, limit=100)
-        self.helper.save_data(df_downloads, f"downloads_{title.replace(' ', '_')}")
+        # ── Fetch & Save Data ───────────────────────────────
+        # Detect if this is a single-day page
+        is_single_day = (start_date == end_date) or end_date == "today"
 
-        df_top_pages = self.helper.get_top_pages(start_date=start_date, end_date=end_date, limit=20)
-        self.helper.save_data(df_top_pages, f"top_pages_{title.replace(' ', '_')}")
+        df_daily, df_countries, df_cities, df_sources, df_downloads, df_top_pages, df_previous = \
+            self._fetch_page_data(start_date, end_date, live=live)
+        name = title.replace(' ', '_')
+        period = (start_date, end_date)
+        traffic = "minutely" if "dateHourMinute" in df_daily.columns else "daily"
+        self.helper.save_data(df_daily, traffic, *period, page=name)
+        for report, df in [("countries", df_countries), ("cities", df_cities), ("sources", df_sources),
+                           ("downloads", df_downloads), ("top_pages", df_top_pages)]:
+            self.helper.save_data(df, report, *period, page=name)
 
         # ── Process Traffic Data ───────────────────────────────
         if is_single_day and not df_daily.empty:
@@ -780,7 +1005,11 @@ class ReportGenerator:
         total_views = int(df_daily['screenPageViews'].astype(int).sum()) if not df_daily.empty else 0
         total_events = int(df_daily['eventCount'].astype(int).sum()) if not df_daily.empty else 0
 
-        scorecard = self._scorecard_html(total_users, total_sessions, total_views, total_events)
+        previous = None
+        if not df_previous.empty:
+            previous = tuple(int(df_previous[c].astype(int).sum())
+                             for c in ['activeUsers', 'sessions', 'screenPageViews', 'eventCount'])
+        scorecard = self._scorecard_html(total_users, total_sessions, total_views, total_events, previous)
 
         # ── Trend Chart ─────────────────────────────────────
         fig_trend = go.Figure()
@@ -811,7 +1040,7 @@ class ReportGenerator:
 
         # ── World Map ───────────────────────────────────────
         if not df_countries.empty:
-            df_countries['country'] = df_countries['country'].replace({'Türkiye': 'Turkey', 'Turkiye': 'Turkey'})
+            df_countries['country'] = df_countries['country'].astype(str).replace({'Türkiye': 'Turkey', 'Turkiye': 'Turkey'})
             df_countries['activeUsers'] = df_countries['activeUsers'].astype(int)
             fig_world = px.choropleth(df_countries, locations="country", locationmode="country names",
                                       color="activeUsers", hover_name="country",
@@ -824,8 +1053,8 @@ class ReportGenerator:
 
         # ── Turkey Cities (ALL cities) ──────────────────────
         if not df_cities.empty:
-            df_cities['city'] = df_cities['city'].str.title()
-            df_city_agg = df_cities.groupby('city')['activeUsers'].sum().reset_index()
+            df_cities['city'] = df_cities['city'].str.title().astype('category')
+            df_city_agg = df_cities.groupby('city', observed=True)['activeUsers'].sum().reset_index()
             df_city_agg['activeUsers'] = df_city_agg['activeUsers'].astype(int)
             df_city_agg = df_city_agg.sort_values(by='activeUsers', ascending=True)
 
@@ -845,7 +1074,7 @@ class ReportGenerator:
 
         # ── Traffic Sources ─────────────────────────────────
         if not df_sources.empty and 'sessionDefaultChannelGroup' in df_sources.columns:
-            src_agg = df_sources.groupby('sessionDefaultChannelGroup')['activeUsers'].sum().reset_index().sort_values('activeUsers', ascending=True)
+            src_agg = df_sources.groupby('sessionDefaultChannelGroup', observed=True)['activeUsers'].sum().reset_index().sort_values('activeUsers', ascending=True)
             fig_source = px.bar(src_agg, x="activeUsers", y="sessionDefaultChannelGroup", orientation='h',
                                 title="Trafik Kaynakları", text="activeUsers",
                                 color="sessionDefaultChannelGroup", color_discrete_sequence=px.colors.qualitative.Pastel)
@@ -932,6 +1161,8 @@ class ReportGenerator:
         source_html = fig_source.to_html(full_html=False, include_plotlyjs='cdn', config=plotly_static)
 
         # ── HTML Assembly ───────────────────────────────────
+        # The live page reloads itself at the rate run_live rebuilds it
+        refresh_meta = f'<meta http-equiv="refresh" content="{LIVE_INTERVAL}">' if live else ''
         html = f"""
         <!DOCTYPE html>
         <html lang="tr">
@@ -939,6 +1170,7 @@ class ReportGenerator:
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <title>Katman Portal - {title}</title>
+            {refresh_meta}
             <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
             <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
             <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
@@ -1168,5 +1400,17 @@ class ReportGenerator:
 
 
 if __name__ == "__main__":
-    gen = ReportGenerator()
-    gen.generate_all_reports()
+    # --async: fetch with the asyncio GA4 client (8 concurrent requests) instead of batchRunReports
+    # --no-facts: query GA4 per page instead of deriving from the day-level fact store
+    # --live: after the build, keep refreshing bugun.html from the Realtime API
+    # --warm-up: only fetch the build's queries into the cache, render nothing
+    # --excel: also write .xlsx copies (later: python warehouse.py <report> <start> <end> --excel <file>)
+    args = sys.argv[1:]
+    gen = ReportGenerator(max_concurrency=8 if "--async" in args else 0, use_facts="--no-facts" not in args,
+                          excel="--excel" in args)
+    if "--warm-up" in args:
+        gen.warm_up()
+    else:
+        gen.generate_all_reports()
+        if "--live" in args:
+            gen.run_live()
@@ -0,0 +1,184 @@
+"""
+Katman Portal - GA4 query planner
+Takes the run_report specs a build is about to make, dedupes them and
+answers the ones it can from other queries instead of separate API calls:
+
+  - a query over a shorter date range, from one with a `date` dimension
+    over a longer range (rows are filtered by date)
+  - a query with fewer dimensions, from one with more, when every metric
+    is additive (rows are summed with a groupby)
+  - several `date` queries over overlapping ranges are merged into one
+    query over their union
+
+Derived results are written to the cache under their own keys, so the
+get_* calls that follow are served from cache as after a normal prefetch.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from google.analytics.data_v1beta.types import DateRange, OrderBy
+from analytics_helper import resolve_date
+
+# Metrics whose values can be summed across dates and dimension values.
+# User counts are distinct per query and ratios are not sums, so neither qualifies.
+ADDITIVE_METRICS = {"screenPageViews", "sessions", "eventCount", "keyEvents", "engagedSessions",
+                    "userEngagementDuration"}
+DEFAULT_LIMIT = 100000
+MAX_METRICS = 10  # GA4 runReport limit
+
+
+@dataclass(frozen=True)
+class QuerySpec:
+    """Canonical, hashable form of a run_report spec (dates resolved to YYYY-MM-DD)."""
+    dimensions: tuple
+    metrics: tuple
+    start: str
+    end: str
+    filter_key: str = "None"
+    limit: int | None = DEFAULT_LIMIT  # None: every row
+    order: tuple = ()  # (metric, desc) pairs of a server-side top-N
+    dimension_filter: object = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def from_spec(cls, spec):
+        date_range = spec["date_range"]
+        dimension_filter = spec.get("dimension_filter")
+        return cls(
+            dimensions=tuple(spec["dimensions"]),
+            metrics=tuple(spec["metrics"]),
+            start=resolve_date(date_range.start_date).isoformat(),
+            end=resolve_date(date_range.end_date).isoformat(),
+            filter_key=str(dimension_filter) if dimension_filter else "None",
+            limit=spec.get("limit", DEFAULT_LIMIT),
+            order=tuple((o.metric.metric_name, o.desc) for o in spec.get("order_bys") or []),
+            dimension_filter=dimension_filter,
+        )
+
+    def to_spec(self):
+        """run_report keyword arguments for this query."""
+        spec = dict(dimensions=list(self.dimensions), metrics=list(self.metrics),
+                    date_range=DateRange(start_date=self.start, end_date=self.end),
+                    dimension_filter=self.dimension_filter, limit=self.limit)
+        if self.order:
+            spec["order_bys"] = [OrderBy(metric=OrderBy.MetricOrderBy(metric_name=m), desc=desc)
+                                 for m, desc in self.order]
+        return spec
+
+    def days(self):
+        return (date.fromisoformat(self.end) - date.fromisoformat(self.start)).days + 1
+
+    def limited(self, df):
+        """Whether df may have been cut off by this query's row limit."""
+        return self.limit is not None and len(df) >= self.limit
+
+
+def can_derive(target, source):
+    """Whether target's rows follow from source's rows (assuming source came back complete)."""
+    if target.filter_key != source.filter_key:
+        return False
+    if not set(target.metrics) <= set(source.metrics) or not set(target.dimensions) <= set(source.dimensions):
+        return False
+    if (target.start, target.end) != (source.start, source.end):
+        if "date" not in source.dimensions or not (source.start <= target.start and target.end <= source.end):
+            return False
+    if set(source.dimensions) != set(target.dimensions):
+        return all(m in ADDITIVE_METRICS for m in target.metrics)
+    return True
+
+
+def derive(target, source, df):
+    """Compute target's frame from source's frame (see can_derive)."""
+    columns = list(target.dimensions) + list(target.metrics)
+    if (target.start, target.end) != (source.start, source.end):
+        lo, hi = target.start.replace("-", ""), target.end.replace("-", "")
+        df = df[(df["date"] >= lo) & (df["date"] <= hi)]
+    if set(source.dimensions) != set(target.dimensions):
+        metrics = list(target.metrics)
+        if target.dimensions:
+            df = df.groupby(list(target.dimensions), sort=False, as_index=False, observed=True)[metrics].sum()
+        else:
+            df = df[metrics].sum().to_frame().T
+    if target.order:
+        df = df.sort_values(by=[m for m, _ in target.order], ascending=[not desc for _, desc in target.order])
+        if target.limit is not None:
+            df = df.head(target.limit)
+    return df[columns].reset_index(drop=True)
+
+
+class QueryPlanner:
+    """Plans and runs a set of run_report specs through an AnalyticsHelper."""
+
+    def __init__(self, helper):
+        self.helper = helper
+
+    def _merged(self, specs):
+        """Union-range queries for groups of `date` queries that differ only in range (and metrics)."""
+        groups = {}
+        for s in specs:
+            if "date" in s.dimensions:
+                groups.setdefault((frozenset(s.dimensions), s.filter_key), []).append(s)
+        merged = []
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            metrics = tuple(dict.fromkeys(m for s in group for m in s.metrics))
+            start, end = min(s.start for s in group), max(s.end for s in group)
+            limits = [s.limit for s in group]
+            limit = None if None in limits else max([DEFAULT_LIMIT] + limits)
+            union = QuerySpec(group[0].dimensions, metrics, start, end, group[0].filter_key, limit,
+                              dimension_filter=group[0].dimension_filter)
+            # Only merge if the union range isn't longer than the separate ranges combined
+            if len(metrics) <= MAX_METRICS and union.days() <= sum(s.days() for s in group):
+                merged.append(union)
+        return merged
+
+    def plan(self, specs):
+        """Return (queries to fetch, {derived query: source query}) for a list of run_report specs."""
+        unique = list(dict.fromkeys(QuerySpec.from_spec(s) for s in specs))
+        fetch = self._merged(unique)
+        derived = {}
+        # Wider queries first, so they become the sources of narrower ones
+        for target in sorted(unique, key=lambda s: (-len(s.dimensions), -s.days())):
+            if target in fetch:
+                continue
+            source = next((s for s in fetch if can_derive(target, s)), None)
+            if source is None:
+                fetch.append(target)
+            else:
+                derived[target] = source
+        # A merged query no other query ended up using is not worth a call of its own
+        used = set(derived.values())
+        fetch = [s for s in fetch if s in unique or s in used]
+        return fetch, derived
+
+    def run(self, specs):
+        """Fetch specs with as few API queries as possible; returns the number of queries sent."""
+        # Multi-range queries already pack their ranges into one request and are sent as they are
+        ranged = [s for s in specs if isinstance(s["date_range"], (list, tuple))]
+        specs = [s for s in specs if not isinstance(s["date_range"], (list, tuple))]
+        fetch, derived = self.plan(specs)
+        frames = dict(zip(fetch, self.helper.run_batch([s.to_spec() for s in fetch] + ranged)))
+
+        fallback = []
+        for target, source in derived.items():
+            df = frames[source]
+            # A failed (empty) or row-limited source can't stand in for anything
+            if df.empty or source.limited(df):
+                fallback.append(target)
+                continue
+            df = derive(target, source, df)
+            if not target.order and target.limited(df):
+                fallback.append(target)
+                continue
+            spec = target.to_spec()
+            key = self.helper._get_cache_key(spec["dimensions"], spec["metrics"], spec["date_range"],
+                                             spec["dimension_filter"], spec["limit"], spec.get("order_bys"))
+            self.helper._save_to_cache(key, df, spec)
+        if fallback:
+            self.helper.run_batch([s.to_spec() for s in fallback])
+
+        requested = len({QuerySpec.from_spec(s) for s in specs}) + len(ranged)
+        sent = len(fetch) + len(fallback) + len(ranged)
+        specs += ranged
+        print(f"  [PLAN] {len(specs)} sorgu ({requested} benzersiz) -> {sent} API sorgusu, "
+              f"{len(derived) - len(fallback)} sonuç yerelde türetildi ({len(specs) - sent} çağrı tasarrufu)")
+        return sent
@@ -1,6 +1,6 @@
 """
 Katman Portal - Full Pipeline Runner
-Crawl -> GA4 Data -> Dashboard -> docs/ -> Git Push
+Crawl -> GA4 onbellek isitma -> Dashboard -> docs/ -> Git Push
 
 Kullanim:
   python run_pipeline.py              # Tum adimlar (akilli atlama aktif)
@@ -40,12 +40,12 @@ def is_fresh(directory, hours=STALE_HOURS):
     return age < timedelta(hours=hours)
 
 
-def run_step(name, cmd):
+def run_step(name, cmd, *args):
     print(f"\n{'='*60}", flush=True)
     print(f"  [{datetime.now().strftime('%H:%M:%S')}] {name}", flush=True)
     print(f"{'='*60}", flush=True)
     result = subprocess.run(
-        [sys.executable, cmd],
+        [sys.executable, cmd, *args],
         cwd=PROJECT_DIR,
         timeout=600,
     )
@@ -108,9 +108,10 @@ def main():
     else:
         print(f"\n  [ATLANDI] Crawl (son {STALE_HOURS} saat icinde taranmis)", flush=True)
 
-    # Adim 2: GA4 veri cekme
+    # Adim 2: GA4 veri cekme - dashboard'un tum sorgulari paralel olarak onbellege cekilir,
+    # Adim 3 sonra tamamen onbellekten calisir
     if force or not is_fresh(CACHE_DIR):
-        run_step("Adim 2: GA4 veri cekme", "analytics_helper.py")
+        run_step("Adim 2: GA4 onbellek isitma", "generate_report.py", "--warm-up", "--async")
     else:
         print(f"\n  [ATLANDI] GA4 fetch (son {STALE_HOURS} saat icinde cekilmis)", flush=True)
 
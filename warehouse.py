@@ -0,0 +1,211 @@
+"""
+Katman Portal - Parquet warehouse for exported reports
+Every table passed to AnalyticsHelper.save_data lands in one hive-partitioned
+Parquet dataset under exported_data/warehouse/, partitioned by report type
+and date:
+
+  report=daily/day=2026-09-01/part-0.parquet                         # day-level rows
+  report=countries/start=2026-09-01/end=2026-09-30/Eylul_2026.parquet # period totals
+
+Tables with a date / dateHour / dateHourMinute column are split into one
+partition per day, so overlapping pages (month, year, last 30 days) share
+the same day partitions. Other tables get one partition per period, with
+one file per page (its name is also kept in a `page` column). Writing a
+page's table again replaces its file (upsert); everything else is kept,
+so history accumulates run after run. A page whose period moves with
+the calendar (last 30 days, the running month) keeps only its latest
+period. query() reads one report and prunes partitions by date before
+opening any file.
+
+Period tables of different pages overlap: a year, its months, the last
+30 days and the day pages all count the same traffic. Sum a period
+report only within one page (query(..., page=...)), or over pages that
+don't overlap; day-level reports can be summed over any range.
+
+Kullanim:
+  python warehouse.py                                   # Rapor ve bolum ozeti
+  python warehouse.py daily 2026-09-01 2026-09-30       # Bir raporu tarih araligiyla sorgula
+  python warehouse.py countries 2026-01-01 2026-12-31 --page 2026_Yılı
+  python warehouse.py countries 2026-01-01 2026-12-31 --excel countries.xlsx
+"""
+import os
+import sys
+import glob
+import shutil
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import date, datetime
+
+WAREHOUSE_DIR = os.path.join("exported_data", "warehouse")
+DAY_COLUMNS = ["date", "dateHour", "dateHourMinute"]  # first 8 characters are YYYYMMDD
+
+
+def _remove_empty(directory, stop):
+    """Remove directory and its empty parents up to (not including) stop."""
+    while directory != stop and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
+def _iso(day):
+    """YYYY-MM-DD of a date or an ISO date string (raises ValueError for anything else)."""
+    return day.isoformat() if isinstance(day, date) else date.fromisoformat(str(day)).isoformat()
+
+
+class Warehouse:
+    """Hive-partitioned Parquet dataset of exported reports (report=/day= or report=/start=/end=)."""
+
+    def __init__(self, root=WAREHOUSE_DIR):
+        self.root = root
+        # Period writes look at and remove other files of the report, so they go one at a time
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _report_dir(self, report):
+        return os.path.join(self.root, f"report={report}")
+
+    def _replace(self, directory, table, filename="part-0.parquet"):
+        """Write table as filename in a partition; readers see the old or the new file, never half of one."""
+        os.makedirs(directory, exist_ok=True)
+        # Dot prefix: dataset discovery skips files that are still being written
+        tmp_path = os.path.join(directory, f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(directory, filename))
+
+    def _period_path(self, report, start_date, end_date, page=None):
+        return os.path.join(self._report_dir(report), f"start={_iso(start_date)}", f"end={_iso(end_date)}",
+                            f"{page or 'part-0'}.parquet")
+
+    def _write_period(self, report_dir, directory, table, page):
+        filename = f"{page or 'part-0'}.parquet"
+        with self._lock:
+            if page:
+                # The page's earlier period (a rolling window, or the running month before today)
+                for old in glob.glob(os.path.join(glob.escape(report_dir), "start=*", "end=*", glob.escape(filename))):
+                    if os.path.dirname(old) != directory:
+                        os.remove(old)
+                        _remove_empty(os.path.dirname(old), report_dir)
+            self._replace(directory, table, filename)
+
+    def write(self, df, report, start_date, end_date, page=None):
+        """Upsert df as report for start_date..end_date (YYYY-MM-DD); returns the partitions written.
+
+        page names the dashboard page a period table belongs to; it is stored
+        in a `page` column, and writing it replaces the page's previous period.
+        """
+        if df.empty:
+            return 0
+        # Plain strings on disk: Parquet dictionary-encodes them anyway, and partitions
+        # written from categorical and string frames must share one schema
+        df = df.astype({c: str for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+        df = df.reset_index(drop=True)
+        table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata()
+        report_dir = self._report_dir(report)
+        day_column = next((c for c in DAY_COLUMNS if c in df.columns), None)
+        if day_column is None:
+            if page:
+                table = table.append_column("page", pa.array([page] * table.num_rows, pa.string()))
+            path = self._period_path(report, start_date, end_date, page)
+            self._write_period(report_dir, os.path.dirname(path), table, page)
+            return 1
+        days = df[day_column].astype(str).str[:8]
+        groups = days.groupby(days, sort=True).indices
+        for day, rows in groups.items():
+            day = datetime.strptime(day, "%Y%m%d").date().isoformat()
+            self._replace(os.path.join(report_dir, f"day={day}"), table.take(pa.array(rows)))
+        return len(groups)
+
+    def has(self, report, start_date, end_date, page=None):
+        """Whether the table of page for start_date..end_date is stored.
+
+        Day partitions are never removed, so for a day-level report this is
+        whether the report exists.
+        """
+        report_dir = self._report_dir(report)
+        entries = os.listdir(report_dir) if os.path.isdir(report_dir) else []
+        if entries and entries[0].startswith("day="):
+            return True
+        return os.path.exists(self._period_path(report, start_date, end_date, page))
+
+    def reports(self):
+        """Names of the reports in the warehouse."""
+        return sorted(d.split("=", 1)[1] for d in os.listdir(self.root) if d.startswith("report="))
+
+    def partitions(self, report):
+        """Partition paths of a report (e.g. "day=2026-09-01"), sorted."""
+        report_dir = self._report_dir(report)
+        return sorted(os.path.relpath(directory, report_dir) for directory, _, files in os.walk(report_dir)
+                      if any(f.endswith(".parquet") for f in files))
+
+    def drop(self, report):
+        """Remove a report with all its partitions."""
+        shutil.rmtree(self._report_dir(report), ignore_errors=True)
+
+    def dataset(self, report):
+        """pyarrow dataset of one report (None if it has no data), partition keys as string columns."""
+        report_dir = self._report_dir(report)
+        entries = os.listdir(report_dir) if os.path.isdir(report_dir) else []
+        if not entries:
+            return None
+        keys = ["day"] if entries[0].startswith("day=") else ["start", "end"]
+        partitioning = ds.partitioning(pa.schema([(k, pa.string()) for k in keys]), flavor="hive")
+        dataset = ds.dataset(report_dir, format="parquet", partitioning=partitioning)
+        # Columns can differ between runs (a metric added later); read every file with the union
+        schema = pa.unify_schemas([f.physical_schema for f in dataset.get_fragments()] + [partitioning.schema])
+        return ds.dataset(report_dir, format="parquet", partitioning=partitioning, schema=schema)
+
+    def query(self, report, start_date=None, end_date=None, columns=None, filter=None, page=None):
+        """Rows of a report within start_date..end_date (YYYY-MM-DD) as a DataFrame.
+
+        Day-level reports return the days in range, period reports the periods
+        that lie entirely within it, each row tagged with its page. Those
+        periods overlap, so pass page (e.g. "2026_Yılı") to get one page's
+        rows. filter is an extra pyarrow expression, e.g.
+        ds.field("country") == "Turkey". All of them are pushed down to the scan.
+        """
+        dataset = self.dataset(report)
+        if dataset is None:
+            return pd.DataFrame()
+        by_day = "day" in dataset.schema.names
+        conditions = []
+        if start_date is not None:
+            conditions.append(ds.field("day" if by_day else "start") >= _iso(start_date))
+        if end_date is not None:
+            conditions.append(ds.field("day" if by_day else "end") <= _iso(end_date))
+        if page is not None and "page" in dataset.schema.names:  # day-level rows aren't per page
+            conditions.append(ds.field("page") == page)
+        if filter is not None:
+            conditions.append(filter)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        df = dataset.to_table(columns=columns, filter=expression).to_pandas()
+        # File order isn't date order; keep each partition's rows as they were written
+        keys = [k for k in (["day"] if by_day else ["start", "end"]) if k in df.columns]
+        return df.sort_values(keys, kind="stable").reset_index(drop=True) if keys else df
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {}
+    for option in ("--excel", "--page"):
+        if option in args:
+            i = args.index(option)
+            options[option] = args[i + 1]
+            args = args[:i] + args[i + 2:]
+    excel = options.get("--excel")
+    warehouse = Warehouse()
+    if not args:
+        for report in warehouse.reports():
+            parts = warehouse.partitions(report)
+            print(f"{report:12s} {len(parts):5d} bolum" + (f"  {parts[0]} .. {parts[-1]}" if parts else ""))
+    else:
+        df = warehouse.query(args[0], *args[1:3], page=options.get("--page"))
+        print(f"{args[0]}: {len(df)} satir")
+        print(df.head(20).to_string(index=False))
+        if excel:
+            df.to_excel(excel, index=False)
+            print(f"-> {excel}")